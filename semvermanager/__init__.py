@@ -29,11 +29,22 @@ zeros the MINOR and the PATCH value.
 
 import os
 import re
+import json
+import copy
 import sys
+import time
+import random
+import shutil
+import struct
+import itertools
 import argparse
+import importlib
 
 from typing import List
 from .command import Command,  Query, QueryError,  CommandError, OperationRunner, EchoCommand
+from .metrics import Metrics, NULL_METRICS, make_sink
+from .tracing import Tracer, NULL_TRACER
+from .locking import FileLock, temp_file, discard_temp
 
 
 class VersionError(ValueError):
@@ -41,6 +52,11 @@ class VersionError(ValueError):
     pass
 
 
+class VersionConflictError(VersionError):
+    """A compare-and-swap bump found a different version than expected"""
+    pass
+
+
 class Version:
     """
     Handle creation and storage of SEMVER version numbers. In this case
@@ -66,6 +82,11 @@ class Version:
         :param lhs : str The candidate str for the lhs of a VERSION line
         :param separator: str the seperator string between the field name and the version
         """
+        # rendered forms, built on first use and cleared by every mutation
+        self._str = None
+        self._bare = None
+        self._repr = None
+
         if isinstance(lhs, str):
             self._lhs = lhs
         else:
@@ -106,19 +127,28 @@ class Version:
     def bump(self, field):
         self.bump_map()[field]()
 
+    def _invalidate(self):
+        self._str = None
+        self._bare = None
+        self._repr = None
+
     def bump_major(self):
         self._patch = 0
         self._minor = 0
         self._major += 1
+        self._invalidate()
 
     def bump_minor(self):
         self._patch = 0
         self._minor += 1
+        self._invalidate()
 
     def bump_patch(self):
         self._patch += 1
+        self._invalidate()
 
     def bump_tag(self):
+        self._invalidate()
         if self._tag_index == len(Version.TAGS) - 1:
             self._tag_index = 0
         else:
@@ -138,6 +168,10 @@ class Version:
     def lhs(self):
         return self._lhs
 
+    @property
+    def separator(self):
+        return self._separator
+
     @property
     def major(self):
         return self._major
@@ -146,6 +180,7 @@ class Version:
     def major(self, value):
         assert isinstance(value, int) and value >= 0
         self._major = value
+        self._invalidate()
 
     @property
     def minor(self):
@@ -155,6 +190,7 @@ class Version:
     def minor(self, value):
         assert isinstance(value, int) and value >= 0
         self._minor = value
+        self._invalidate()
 
     @property
     def patch(self):
@@ -164,6 +200,7 @@ class Version:
     def patch(self, value):
         assert isinstance(value, int) and value >= 0
         self._patch = value
+        self._invalidate()
 
     @property
     def tag(self):
@@ -171,8 +208,10 @@ class Version:
 
     @tag.setter
     def tag(self, value):
-        assert self._tag in self.TAGS.values()
+        assert value in self.TAGS.values()
         self._tag = value
+        self._tag_index = list(self.TAGS.values()).index(value)
+        self._invalidate()
 
     @property
     def tag_version(self):
@@ -182,6 +221,7 @@ class Version:
     def tag_version(self, value):
         assert isinstance(value, int) and value >= 0
         self._tag_version = value
+        self._invalidate()
 
 
     def bump_map(self):
@@ -219,7 +259,8 @@ class Version:
         return self.field_map()[field]
 
     @staticmethod
-    def update(filename, version, lhs="VERSION", separator="="):
+    def update(filename, version, lhs="VERSION", separator="=", journal=None, metrics=NULL_METRICS, tracer=NULL_TRACER,
+               dry_run=False, commit=None):
         """
         Find any line starting with "VERSION" and replace that line with
         the new `version`.
@@ -229,32 +270,196 @@ class Version:
         :param version: The new version object
         :param lhs: The label string
         :param separator: label<seperator>value
+        :param journal: a `BumpJournal` to record the change in
+        :param metrics: a `Metrics` object to record timings and counts in
+        :param tracer: a `Tracer` to record spans in
+        :param dry_run: report the lines that would be replaced without changing the file
+        :param commit: a `semvermanager.command.Commit`, see `_swap`
         :return: A tuple (number of lines updated, list(line_numbers))
         """
 
-        count = 0 # Number of replacements
+        if dry_run:
+            with open(filename, "r", errors="replace") as file:
+                return filename, Version.version_lines(file, lhs, separator)
+
+        old = None  # the first version replaced
         lines: List[int] = [] # line numbers of replacement lines
-        with open(filename, "r") as input_file:
-            with open(filename+".temp", "w") as output_file:
-                for i, line in enumerate(input_file, 1):
-                    candidate = line.strip()
-                    if candidate.startswith(lhs):
-                        try:
+        with tracer.span("Version.update", path=filename) as span, FileLock(filename):
+            with metrics.timer("open"):
+                # bytes that aren't valid text are written back unchanged, see temp_file
+                with open(filename, "r", errors="surrogateescape") as input_file:
+                    contents = input_file.readlines()
+                    span.set("bytes_read", input_file.buffer.tell())
+
+            rendered = f"{str(version)}\n"
+            for i, line in enumerate(contents, 1):
+                if line.strip().startswith(lhs):
+                    metrics.incr("lines_matched")
+                    try:
+                        with metrics.timer("parse"), tracer.span("Version.parse_version", line=i):
                             v = Version.parse_version(line, lhs, separator=separator)
-                            if v:
-                                output_file.write(f"{str(version)}\n")
-                                lines.append(i)
-                                count = count + 1
-                        except VersionError:
-                            output_file.write(line)
+                    except VersionError:
+                        metrics.incr("parse_failures")
+                        continue
+                    if old is None:
+                        old = v
+                    contents[i - 1] = rendered
+                    lines.append(i)
+            metrics.incr("lines_scanned", len(contents))
+            span.set("lines_matched", len(lines))
+
+            record = journal.prepare(filename, lhs, old, version) if journal and old is not None else None
+            output_file, temp_name = temp_file(filename)
+            try:
+                with metrics.timer("write"), output_file:
+                    output_file.writelines(contents)
+                Version._swap(filename, temp_name, metrics, commit)
+            finally:
+                discard_temp(temp_name)
+            if record:
+                journal.append(record)
 
-                    else:
-                        output_file.write(line)
+        return filename, lines
+
+    @staticmethod
+    def version_lines(lines, lhs="VERSION", separator="="):
+        """
+        :param lines: an iterable of lines, e.g. an open file
+        :return: the line numbers of the lines `update` would replace
+        """
+        found = []
+        for i, line in enumerate(lines, 1):
+            if line.strip().startswith(lhs):
+                try:
+                    Version.parse_version(line, lhs, separator=separator)
+                    found.append(i)
+                except VersionError:
+                    pass
+        return found
 
-        os.rename(filename, filename+".old")
-        os.rename(filename+".temp", filename)
+    @staticmethod
+    def _swap(filename, temp_name, metrics=NULL_METRICS, commit=None):
+        """
+        Keep the current `filename` as `filename`.old and atomically move
+        `temp_name` into its place. Readers see either the old or the new
+        file, never a missing one.
+
+        :param commit: if given, `filename` is only replaced if
+            `commit.claim()` succeeds, i.e. the call has not been abandoned
+            by an `OperationRunner` timeout
+        :raises VersionError: if the call was abandoned
+        """
+        if commit is not None and not commit.claim():
+            raise VersionError(f"Abandoned the change to '{filename}' after a timeout")
+        old_name = filename + ".old"
+        with metrics.timer("rename"):
+            if os.path.exists(old_name):
+                os.unlink(old_name)
+            try:
+                os.link(filename, old_name)
+            except OSError:  # no hard links on this file system
+                shutil.copy2(filename, old_name)
+            os.replace(temp_name, filename)
 
-        return filename, lines
+    @staticmethod
+    def bump_file(filename, field, lhs="VERSION", separator="=", expected=None, journal=None,
+                  metrics=NULL_METRICS, tracer=NULL_TRACER, commit=None):
+        """
+        Find the version in `filename`, bump `field` and write the new version
+        back to every version line. This is `find` followed by `bump` and
+        `update`, but the file is read once and each candidate line is
+        parsed once. The file is locked for the whole read-modify-write.
+
+        If `expected` is given the bump is a compare-and-swap, it only happens
+        if the version in the file still equals `expected`.
+
+        :param filename: A path to a file containing at least one VERSION line
+        :param field: the field to bump, one of `Version.FIELDS`
+        :param lhs: The label string
+        :param separator: label<seperator>value
+        :param expected: the `Version` the file must hold for the bump to happen
+        :param journal: a `BumpJournal` to record the bump in
+        :param metrics: a `Metrics` object to record timings and counts in
+        :param tracer: a `Tracer` to record spans in
+        :param commit: a `semvermanager.command.Commit`, see `_swap`
+        :return: A tuple (bumped version, list(line_numbers))
+        :raises VersionError: if there is no version line or the first one won't parse
+        :raises VersionConflictError: if the file does not hold `expected`
+        """
+        with tracer.span("Version.bump_file", path=filename, field=field) as span, FileLock(filename):
+            with metrics.timer("open"):
+                with open(filename, "r", errors="surrogateescape") as file:
+                    contents = file.readlines()
+                    span.set("bytes_read", file.buffer.tell())
+
+            version = None
+            matches: List[int] = []  # indexes of the lines holding a version
+            metrics.incr("lines_scanned", len(contents))
+            for i, line in enumerate(contents):
+                if line.strip().startswith(lhs):
+                    metrics.incr("lines_matched")
+                    try:
+                        with metrics.timer("parse"), tracer.span("Version.parse_version", line=i + 1):
+                            v = Version.parse_version(line, lhs, separator=separator)
+                    except VersionError:
+                        metrics.incr("parse_failures")
+                        if version is None:  # as find() does for the first candidate
+                            raise
+                        continue
+                    if version is None:
+                        version = v
+                    matches.append(i)
+
+            if version is None:
+                raise VersionError(f"No label or version in {filename}")
+
+            if expected is not None and version != expected:
+                raise VersionConflictError(f"Expected {expected.bare_version} in '{filename}' "
+                                           f"but found {version.bare_version}")
+
+            old = copy.copy(version)
+            version.bump(field)
+            rendered = f"{str(version)}\n"
+            for i in matches:
+                contents[i] = rendered
+
+            record = journal.prepare(filename, lhs, old, version) if journal else None
+            output_file, temp_name = temp_file(filename)
+            try:
+                with metrics.timer("write"), output_file:
+                    output_file.writelines(contents)
+                Version._swap(filename, temp_name, metrics, commit)
+            finally:
+                discard_temp(temp_name)
+            if record:
+                journal.append(record)
+            span.set("lines_matched", len(matches))
+
+        return version, [i + 1 for i in matches]
+
+    @staticmethod
+    def compare_and_bump(filename, field, lhs="VERSION", separator="=", retries=5, **kwargs):
+        """
+        Optimistic bump. Read the current version without taking the lock,
+        then bump it with `bump_file` only if it is still the version that
+        was read. If another writer got there first, read again and retry.
+
+        :param retries: how many conflicts to tolerate before giving up
+        :return: A tuple (bumped version, list(line_numbers))
+        :raises VersionConflictError: if every attempt conflicted
+        """
+        attempt = 0
+        while True:
+            expected = Version.find(filename, lhs, separator)
+            if expected is None:
+                raise VersionError(f"No label or version in {filename}")
+            try:
+                return Version.bump_file(filename, field, lhs, separator, expected=expected, **kwargs)
+            except VersionConflictError:
+                attempt += 1
+                if attempt > retries:
+                    raise
+                time.sleep(random.uniform(0, 0.001 * 2 ** attempt))
 
     def write(self, filename):
         """
@@ -271,17 +476,34 @@ class Version:
         return filename, self
 
     @staticmethod
-    def find(filename, lhs="VERSION", separator="="):
+    def find(filename, lhs="VERSION", separator="=", metrics=NULL_METRICS, tracer=NULL_TRACER):
         """Look for the first instance of a VERSION definition in a file
         and try and parse it as a `Version`"""
 
         version = None
-        with open(filename, "r") as file:
-            for line in file:
-                line = line.strip()
-                if line.startswith(lhs):
-                    version = Version.parse_version(line, lhs=lhs, separator=separator)
-                    break
+        scanned = 0
+        with tracer.span("Version.find", path=filename) as span:
+            with metrics.timer("open"):
+                file = open(filename, "r", errors="replace")
+            with file:
+                try:
+                    for line in file:
+                        scanned += 1
+                        line = line.strip()
+                        if line.startswith(lhs):
+                            metrics.incr("lines_matched")
+                            span.set("lines_matched", 1)
+                            try:
+                                with metrics.timer("parse"), tracer.span("Version.parse_version", line=scanned):
+                                    version = Version.parse_version(line, lhs=lhs, separator=separator)
+                            except VersionError:
+                                metrics.incr("parse_failures")
+                                raise
+                            break
+                finally:
+                    metrics.incr("lines_scanned", scanned)
+                    # what was pulled from the file, read-ahead included, not just the lines scanned
+                    span.set("bytes_read", file.buffer.tell())
 
         return version
 
@@ -374,6 +596,82 @@ class Version:
 
         return Version(major, minor, patch, tag, tag_version, lhs=lhs, separator=separator)
 
+    def pack(self):
+        """
+        Pack the version fields into a single 64 bit int. Packed versions
+        compare in version precedence order, alpha < beta < release, so
+        they can be stored and compared without rebuilding `Version` objects.
+
+        The layout is MAJOR, MINOR and PATCH in 16 bits each, then the tag
+        index in 2 bits and TAG_VERSION in 14 bits.
+
+        :return: an int in the range 0 to 2**64-1
+        :raises VersionError: if a field is too large to pack
+        """
+        if self._major > 0xFFFF or self._minor > 0xFFFF or self._patch > 0xFFFF or self._tag_version > 0x3FFF:
+            raise VersionError(f"{self.bare_version} has a field too large to pack")
+        return self._major << 48 | self._minor << 32 | self._patch << 16 | self._tag_index << 14 | self._tag_version
+
+    @staticmethod
+    def unpack(key, lhs="VERSION", separator="="):
+        """
+        The inverse of `pack`.
+
+        :param key: an int returned by `Version.pack`
+        :return: a new `Version`
+        :raises VersionError: if `key` is not a packed version
+        """
+        tag = Version.TAGS.get(key >> 14 & 0x3)
+        if tag is None or not 0 <= key < 1 << 64:
+            raise VersionError(f"{key:#x} is not a packed version")
+        return Version(key >> 48 & 0xFFFF, key >> 32 & 0xFFFF, key >> 16 & 0xFFFF, tag,
+                       key & 0x3FFF, lhs=lhs, separator=separator)
+
+    def to_bytes(self):
+        """
+        The 8 byte big-endian form of `pack`. Encoded versions sort bytewise
+        in precedence order. The label and separator are not included.
+        """
+        return self.pack().to_bytes(8, "big")
+
+    @staticmethod
+    def from_bytes(data, lhs="VERSION", separator="="):
+        """
+        The inverse of `to_bytes`.
+        """
+        return Version.unpack(int.from_bytes(data, "big"), lhs, separator)
+
+    @staticmethod
+    def pack_many(versions):
+        """
+        Encode a sequence of versions as consecutive 8 byte records.
+
+        :return: bytes of length 8 * len(versions)
+        """
+        keys = [v.pack() for v in versions]
+        return struct.pack(f">{len(keys)}Q", *keys)
+
+    @staticmethod
+    def unpack_many(data, lhs="VERSION", separator="="):
+        """
+        The inverse of `pack_many`.
+
+        :return: a list of `Version` objects
+        """
+        unpack = Version.unpack
+        return [unpack(k, lhs, separator) for k in struct.unpack(f">{len(data) // 8}Q", data)]
+
+    def __reduce__(self):
+        # pickle as the packed int, falling back to the fields if they are too large to pack
+        try:
+            key = self.pack()
+        except VersionError:
+            return Version, (self._major, self._minor, self._patch, self._tag, self._tag_version,
+                             self._lhs, self._separator)
+        if self._lhs == "VERSION" and self._separator == "=":
+            return _unpack_version, (key,)
+        return _unpack_version, (key, self._lhs, self._separator)
+
     def __eq__(self, other):
         return self.major == other.major and \
                self.minor == other.minor and \
@@ -382,45 +680,79 @@ class Version:
                self.tag_version == other.tag_version
 
     def __str__(self):
-        if self.tag == "":
-            return f"{self._lhs} {self._separator} '{self._major}.{self._minor}.{self._patch}'"
-        else:
-            return f"{self._lhs} {self._separator} '{self._major}.{self._minor}.{self._patch}-{self._tag}{self._tag_version}'"
+        if self._str is None:
+            self._str = f"{self._lhs} {self._separator} '{self.bare_version}'"
+        return self._str
 
     def __repr__(self):
-        return f"{self.__class__.__qualname__}({self.major}, {self.minor}, {self.patch}, '{self.tag}', {self.tag_version}, '{self._lhs}', '{self._separator}')"
+        if self._repr is None:
+            self._repr = f"{self.__class__.__qualname__}({self.major}, {self.minor}, {self.patch}, '{self.tag}', {self.tag_version}, '{self._lhs}', '{self._separator}')"
+        return self._repr
 
     @property
     def bare_version(self):
-        if self.tag == "":
-            return f'{self._major}.{self._minor}.{self._patch}'
-        else:
-            return f'{self._major}.{self._minor}.{self._patch}-{self._tag}{self.tag_version}'
+        if self._bare is None:
+            if self._tag == "":
+                self._bare = f'{self._major}.{self._minor}.{self._patch}'
+            else:
+                self._bare = f'{self._major}.{self._minor}.{self._patch}-{self._tag}{self._tag_version}'
+        return self._bare
+
+
+def _unpack_version(key, lhs="VERSION", separator="="):
+    # module level so that pickles refer to it by a short name
+    return Version.unpack(key, lhs, separator)
 
 
 class BumpCommand(Command):
 
-    def __call__(self, filename, label, separator, bump_field):
+    def __init__(self, journal=None):
+        super().__init__()
+        self._journal = journal
+
+    def __call__(self, filename, label, separator, bump_field, expected=None):
         if not os.path.isfile(filename):
-            return False, f"No such file:'{filename}' can't bump {bump_field} version"
+            raise CommandError(f"No such file:'{filename}' can't bump {bump_field} version")
 
-        v = Version.find(filename, label, separator)
-        if v:
-            v.bump(bump_field)
-            Version.update(filename, v, label, separator)
-            self.q.put((filename, v))
-        else:
-            raise VersionError(f"No label or version in {filename}")
+        from .extractors import extractor_for
+        extractor = extractor_for(filename)
+        try:
+            if extractor:
+                v, _ = extractor.bump(filename, bump_field, expected=expected, journal=self._journal,
+                                      metrics=self.metrics, tracer=self.tracer, commit=self.commit)
+            else:
+                v, _ = Version.bump_file(filename, bump_field, label, separator, expected=expected,
+                                         journal=self._journal, metrics=self.metrics, tracer=self.tracer,
+                                         commit=self.commit)
+        except VersionConflictError as e:
+            raise CommandError(e)
+        self.q.put((filename, v))
 
         return self
 
 class UpdateCommand(Command):
 
+    def __init__(self, journal=None, dry_run=False, dedup=None):
+        super().__init__()
+        self._journal = journal
+        self._dry_run = dry_run
+        self._dedup = dedup
+
     def __call__(self, filename, version, label, separator):
         if not os.path.isfile(filename):
             raise CommandError(f"No such file:'{filename}' can't bump {label} version")
 
-        filename, lines = Version.update(filename=filename, version=version, lhs=label)
+        from .extractors import extractor_for
+        extractor = extractor_for(filename)
+        if extractor:
+            filename, lines = extractor.update(filename, version, dry_run=self._dry_run, journal=self._journal,
+                                               metrics=self.metrics, tracer=self.tracer, commit=self.commit)
+        elif self._dry_run and self._dedup:
+            lines = self._dedup.update_lines(filename, label, separator, metrics=self.metrics, tracer=self.tracer)
+        else:
+            filename, lines = Version.update(filename=filename, version=version, lhs=label, separator=separator,
+                                             journal=self._journal, metrics=self.metrics, tracer=self.tracer,
+                                             dry_run=self._dry_run, commit=self.commit)
         self.q.put((filename, lines))
         return self
 
@@ -452,16 +784,183 @@ class MakeCommand(Command):
 
 class GetVersionQuery(Query):
 
-    def __call__(self, filename):
+    def __init__(self, name=None, q=None, dedup=None):
+        super().__init__(name, q)
+        self._dedup = dedup
+
+    def __call__(self, filename, label="VERSION", separator="="):
+        from .extractors import extractor_for
+        from .semver import SemVer
         try:
             if os.path.isfile(filename):
-                v = Version.find(filename)
+                extractor = extractor_for(filename)
+                if extractor:
+                    v = extractor.find(filename, metrics=self.metrics, tracer=self.tracer)
+                elif self._dedup:
+                    try:
+                        v = self._dedup.find(filename, label, separator, metrics=self.metrics, tracer=self.tracer)
+                    except VersionError:
+                        v = SemVer.find(filename, label, separator)
+                else:
+                    try:
+                        v = Version.find(filename, label, separator, metrics=self.metrics, tracer=self.tracer)
+                    except VersionError:  # not a Version, but may be any SemVer
+                        v = SemVer.find(filename, label, separator)
                 self.q.put((filename,v))
         except FileNotFoundError as e:
             raise QueryError(e)
 
+        return self
+
+
+# These modules build on Version. Their names are re-exported here but only
+# imported on first use, so that importing semvermanager doesn't pay for them.
+_LAZY = {
+    "BuildNumberAllocator": ("allocator", "BuildNumberAllocator"),
+    "version_history": ("history", "version_history"),
+    "version_changes": ("history", "version_changes"),
+    "changed_files": ("history", "changed_files"),
+    "GitError": ("history", "GitError"),
+    "BumpJournal": ("journal", "BumpJournal"),
+    "check_consistent": ("consistency", "check_consistent"),
+    "ConsistencyResult": ("consistency", "ConsistencyResult"),
+    "manifest": ("manifest", None),
+    "extractor_for": ("extractors", "extractor_for"),
+    "SemVer": ("semver", "SemVer"),
+    "LazyVersion": ("lazy", "LazyVersion"),
+    "current": ("runtime", "current"),
+    "cascade": ("cascade", None),
+    "ContentCache": ("dedup", "ContentCache"),
+    "FileFilter": ("sniff", "FileFilter"),
+    "BINARY_EXTENSIONS": ("sniff", "BINARY_EXTENSIONS"),
+    "DEFAULT_MAX_SIZE": ("sniff", "DEFAULT_MAX_SIZE"),
+    "convert": ("convert", None),
+    "shard": ("shard", None),
+    "Config": ("config", "Config"),
+    "ConfigError": ("config", "ConfigError"),
+    "load_config": ("config", "load"),
+    "DEFAULT_CONFIG": ("config", "DEFAULT_CONFIG"),
+}
+
+__all__ = ["Version", "VersionError", "VersionConflictError", "Command", "Query", "QueryError",
+           "CommandError", "OperationRunner", "EchoCommand", "BumpCommand", "UpdateCommand",
+           "MakeCommand", "GetVersionQuery", "main"]
+__all__.extend(_LAZY)
+
+
+def __getattr__(name):
+    try:
+        module, attr = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = importlib.import_module(f".{module}", __name__)
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+def _batches(filenames, config, label, separator):
+    """
+    Yield (filenames, label, separator), using each file's label and
+    separator from `config` where it is configured.
+    """
+    if config is None:
+        yield filenames, label, separator
+        return
+    for (l, s), files in config.groups(filenames, label, separator).items():
+        yield files, l, s
+
+
+def _split_changed(filenames, changed, table):
+    """
+    Split files into those that must be read and those whose version can be
+    reused from `table`, a `manifest.index`. Changed files and files missing
+    from a non empty table are read. With no `filenames`, the changed
+    version files plus every file in the table are considered.
+
+    :return: a tuple (filenames to read, {filename: Version} reused)
+    """
+    from . import manifest, shard
+    if filenames:
+        paths = {f: shard.normalise(os.path.relpath(f)) for f in filenames}
+    else:
+        found = {p for p in changed if manifest.matches(p)} | set(table)
+        paths = {p: p for p in sorted(found, key=manifest.sort_key)}
+    fresh = [f for f, p in paths.items() if p in changed or (table and p not in table)]
+    reused = {f: table[p] for f, p in paths.items() if p not in changed and p in table}
+    return fresh, reused
+
+
+def _expand(filenames):
+    """
+    Yield the files named, replacing each directory by the version files
+    found under it, lazily and in manifest order.
+    """
+    from . import manifest
+    for f in filenames:
+        if os.path.isdir(f):
+            for path in manifest.discover(f):
+                yield os.path.join(f, path)
+        else:
+            yield f
+
+
+def _run(runner, files, window, workers, *args, **kwargs):
+    """
+    Run `runner` over `files`, streaming up to `window` files at once if a
+    window is given, otherwise one at a time.
+    """
+    if window:
+        return runner.stream(_expand(files), *args, window=window, workers=workers, **kwargs)
+    return runner.results(files, *args, **kwargs)
+
+
+def _report_incomplete(runner, ndjson=False):
+    """
+    Report the files a runner gave up on.
+
+    :return: True if any file timed out or was cancelled
+    """
+    from . import shard
+    if ndjson:
+        for _, filename in runner.timed_out:
+            print(shard.record(filename, error="timed out"))
+    if runner.cancelled:
+        # a count, not a list, and a lower bound if the rest of a possibly huge listing was never read
+        more = " or more" if runner.stopped_early else ""
+        print(f"CANCELLED: {runner.cancelled}{more} files were not started before the deadline",
+              file=sys.stderr if ndjson else sys.stdout)
+    return bool(runner.timed_out or runner.cancelled)
+
+
+def _report_consistency(result, ndjson=False):
+    if ndjson:
+        for line in result.records():
+            print(line)
+    else:
+        for filename, error in result.errors.items():
+            print(f"ERROR: {error}")
+        if result.consistent:
+            for v, files in result.versions():
+                print(f"All {len(files)} files hold version {v.bare_version}")
+        else:
+            for v, files in result.versions():
+                print(f"{v.bare_version}: {', '.join(sorted(files))}")
+    if result.exit_code:
+        sys.exit(result.exit_code)
+
 
 def main(args=None):
+    # what the parser and every run need, the other modules are imported by the options that use them
+    from . import convert, manifest, shard
+    from .config import ConfigError, DEFAULT_CONFIG, load as load_config
+    from .sniff import FileFilter, BINARY_EXTENSIONS, DEFAULT_MAX_SIZE
+
     if args is None:
         args = sys.argv
 
@@ -483,6 +982,178 @@ def main(args=None):
         choices=Version.FIELDS,
         help=f"Bump a version field based on the arg {Version.FIELDS}")
 
+    parser.add_argument(
+        "--expect",
+        help="With --bump, only bump if the file still holds this version (compare-and-swap)")
+
+    parser.add_argument(
+        "--cascade",
+        default=False,
+        action="store_true",
+        help=f"With --bump and a config [default: {DEFAULT_CONFIG}], bump the named packages and patch bump "
+             f"everything that depends on them")
+
+    parser.add_argument(
+        "--dry-run",
+        default=False,
+        action="store_true",
+        help="With --cascade or --update, report what would change without changing any files")
+
+    parser.add_argument(
+        "--reserve",
+        type=int,
+        metavar="N",
+        help="Atomically reserve the next N tag_version build numbers without rewriting the file")
+
+    parser.add_argument(
+        "--counter",
+        help="Counter file used by --reserve [default: <filename>.buildno]")
+
+    parser.add_argument(
+        "--history",
+        default=False,
+        action="store_true",
+        help="Report each version the files have held in git history")
+
+    parser.add_argument(
+        "--rev",
+        default="HEAD",
+        help="With --history, the revision to walk back from [default: %(default)s]")
+
+    parser.add_argument(
+        "--tags",
+        default=False,
+        action="store_true",
+        help="With --history, report the version at every tag rather than every change")
+
+    parser.add_argument(
+        "--journal",
+        default=os.environ.get("SEMVERMGR_JOURNAL"),
+        help="Record every bump and update in this journal file [default: $SEMVERMGR_JOURNAL]")
+
+    parser.add_argument(
+        "--show-journal",
+        default=False,
+        action="store_true",
+        help="List the journal entries for the specified files, or for all files")
+
+    parser.add_argument(
+        "--crossed",
+        metavar="VERSION",
+        help="Report the journal entry where the files first reached VERSION")
+
+    parser.add_argument(
+        "--check-consistent",
+        default=False,
+        action="store_true",
+        help="Check that all the files hold the same version, exit 1 if not and 2 on errors")
+
+    parser.add_argument(
+        "--fail-fast",
+        default=False,
+        action="store_true",
+        help="With --check-consistent, stop at the first file that disagrees")
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Give up on any file that takes longer than this to process")
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Don't start any more files once the run has taken this long")
+
+    parser.add_argument(
+        "--dedup",
+        default=False,
+        action="store_true",
+        help="Parse each distinct file content once for --getversion and --update --dry-run")
+
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        metavar="BYTES",
+        help="With --getversion, --check-consistent and --snapshot, skip files larger than this "
+             "[default: %(default)s]. Files to --bump or --update are always read")
+
+    parser.add_argument(
+        "--skip-extension",
+        action="append",
+        metavar="EXT",
+        help="Skip files with this extension, e.g. .dat, as well as known binary formats")
+
+    parser.add_argument(
+        "--no-sniff",
+        default=False,
+        action="store_true",
+        help="Read every file, even ones that contain NUL bytes or are too large")
+
+    parser.add_argument(
+        "--window",
+        type=int,
+        metavar="N",
+        help="Stream --getversion, --bump and --update over up to N files at once, expanding "
+             "directories to the version files under them, with memory bounded by N")
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of threads used to read files in parallel")
+
+    parser.add_argument(
+        "--snapshot",
+        metavar="MANIFEST",
+        help="Record every version line under the given directory [default: .] in MANIFEST")
+
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Report the version lines that differ between two manifests")
+
+    parser.add_argument(
+        "--config",
+        help=f"Project config listing the version files and their labels [default: {DEFAULT_CONFIG} "
+             f"when no files are given, or with --cascade]")
+
+    parser.add_argument(
+        "--shard",
+        metavar="i/N",
+        help="Only process the files in shard i of N (counting from 1), partitioned by a hash of the path")
+
+    parser.add_argument(
+        "--ndjson",
+        default=False,
+        action="store_true",
+        help="With --getversion or --check-consistent, write one JSON object per file")
+
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="RESULT",
+        help="Combine per-shard NDJSON outputs or manifests into one result on stdout")
+
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only read the files that git reports as changed since REF")
+
+    parser.add_argument(
+        "--staged",
+        default=False,
+        action="store_true",
+        help="Only read the files with changes staged for commit")
+
+    parser.add_argument(
+        "--index",
+        metavar="MANIFEST",
+        help="With --changed-since or --staged, take the versions of unchanged files from this "
+             "manifest (paths relative to the current directory)")
+
     parser.add_argument(
         "--getversion",
         default=False,
@@ -495,6 +1166,12 @@ def main(args=None):
         action="store_true",
         help="Return the unquoted version string with 'VERSION='  removed")
 
+    parser.add_argument(
+        "--format",
+        choices=convert.STYLES,
+        help="With --getversion, report versions in this style, e.g. pep440 for 1.2.3a1. "
+             "Not allowed with --ndjson")
+
     parser.add_argument(
         "--overwrite",
         default=False,
@@ -521,6 +1198,22 @@ def main(args=None):
         help="Character used to separate the version label from the version [default: %(default)s]"
     )
 
+    parser.add_argument(
+        "--metrics",
+        help="Write run metrics (timings and counts) to this file"
+    )
+
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        help="Format for --metrics output [default: prometheus for *.prom files, json otherwise]"
+    )
+
+    parser.add_argument(
+        "--trace",
+        help="Write a Chrome trace (chrome://tracing, Perfetto) of the run to this file"
+    )
+
     parser.add_argument(
         "filenames",
         nargs='*',
@@ -529,11 +1222,63 @@ def main(args=None):
 
     args = parser.parse_args(args)
 
+    metrics = Metrics(make_sink(args.metrics, args.metrics_format)) if args.metrics else None
+    tracer = Tracer() if args.trace else None
+    if args.format and (not args.getversion or args.ndjson):
+        parser.error("--format only applies to --getversion, and not with --ndjson")
+    if (args.show_journal or args.crossed) and not args.journal:
+        parser.error("--show-journal and --crossed need a journal, use --journal or set $SEMVERMGR_JOURNAL")
+    if args.reserve is not None and args.reserve < 1:
+        parser.error(f"--reserve needs at least 1 build number not {args.reserve}")
+    journal = None
+    if args.journal:
+        from .journal import BumpJournal
+        journal = BumpJournal(args.journal)
+    dedup = None
+    if args.dedup:
+        from .dedup import ContentCache
+        dedup = ContentCache()
+    file_filter = None
+    if not args.no_sniff:
+        file_filter = FileFilter(args.max_size, BINARY_EXTENSIONS | set(args.skip_extension or ()))
+
+    config = None
+    config_name = args.config
+    # with --cascade the positionals are package names, so the default config still applies
+    if config_name is None and (args.cascade or not args.filenames) and os.path.isfile(DEFAULT_CONFIG):
+        config_name = DEFAULT_CONFIG
+    if config_name:
+        try:
+            config = load_config(config_name)
+        except ConfigError as e:
+            parser.error(str(e))
+
+    filenames = args.filenames or (config.paths if config else [])
+    reused = {}
+    if args.changed_since or args.staged:
+        from .history import changed_files, GitError
+        try:
+            changed = changed_files(args.changed_since, args.staged)
+        except GitError as e:
+            print(f"ERROR: {e}")
+            sys.exit(2)
+        table = manifest.index(args.index, args.label, args.separator) if args.index else {}
+        filenames, reused = _split_changed(filenames, changed, table)
+
+    if args.shard:
+        try:
+            shard_index, shard_total = shard.parse_shard(args.shard)
+        except shard.ShardError as e:
+            parser.error(str(e))
+        shard_root = os.path.dirname(os.path.abspath(config_name)) if config else os.getcwd()
+        filenames = list(shard.select(filenames, shard_index, shard_total, shard_root))
+        reused = {f: reused[f] for f in shard.select(reused, shard_index, shard_total, shard_root)}
+
     if args.version:
         version = Version.parse_version("VERSION=" + args.version, lhs=args.label)
 
     if args.make:
-        cmd_runner = OperationRunner(MakeCommand(args.overwrite))
+        cmd_runner = OperationRunner(MakeCommand(args.overwrite), metrics, tracer)
         for f, v in cmd_runner(args.filenames, args.label, args.separator):
             if v:
                 print(f"Created version {v} in '{f}'")
@@ -541,34 +1286,165 @@ def main(args=None):
                 print(f"Failed to create version file '{f}'")
 
     if args.getversion:
-        cmd_runner = OperationRunner(GetVersionQuery())
-        for cmd in cmd_runner(args.filenames):
-            for filename, item in cmd.items():
-                if args.bareversion:
-                    print(f"Version in {filename} is {item.bareversion}")
-                else:
-                    print(f"Version in {filename} is {item}")
-
-    if args.bump:
+        cmd_runner = OperationRunner(GetVersionQuery(dedup=dedup), metrics, tracer, quiet=args.ndjson,
+                                     timeout=args.timeout, deadline=args.deadline, file_filter=file_filter)
+        found = itertools.chain.from_iterable(_run(cmd_runner, files, args.window, args.workers, label, separator)
+                                              for files, label, separator
+                                              in _batches(filenames, config, args.label, args.separator))
+        found = itertools.chain(found, reused.items())
+        for filename, item in found:
+            if args.ndjson:
+                print(shard.record(filename, version=item))
+            elif args.format and isinstance(item, Version):
+                print(f"Version in {filename} is {convert.render(item, args.format)}")
+            elif args.bareversion:
+                print(f"Version in {filename} is {item.bare_version}")
+            else:
+                print(f"Version in {filename} is {item}")
+        if args.ndjson:
+            for _, filename, e in cmd_runner.errors:
+                print(shard.record(filename, error=e))
+        _report_incomplete(cmd_runner, args.ndjson)
+
+    if args.bump and args.cascade:
+        from . import cascade
+        if config is None or not args.filenames:
+            parser.error("--cascade needs a config and the packages to bump")
+        try:
+            planned = cascade.plan(config, {name: args.bump for name in args.filenames})
+        except VersionError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        for i, level in enumerate(planned):
+            for p in level:
+                print(f"level {i}: {p.name} {p.old.bare_version} -> {p.new.bare_version} ({p.field})")
+        if not args.dry_run:
+            bumped, errors = cascade.execute(config, planned, journal, args.workers)
+            for p, e in errors:
+                print(f"ERROR: {p.name}: {e}")
+            print(f"Bumped {len(bumped)} of {sum(len(level) for level in planned)} packages")
+            if errors:
+                sys.exit(1)
+    elif args.bump:
         if args.bump in Version.FIELDS:
-            cmd_runner = OperationRunner(BumpCommand())
+            cmd_runner = OperationRunner(BumpCommand(journal), metrics, tracer,
+                                         timeout=args.timeout, deadline=args.deadline)
 
-            for cmd in cmd_runner(args.filenames, args.label, args.separator, args.bump):
-                for filename, version in cmd.items():
+            expected = Version.parse_version(args.expect, lhs=args.label) if args.expect else None
+            for files, label, separator in _batches(filenames, config, args.label, args.separator):
+                for filename, version in _run(cmd_runner, files, args.window, args.workers,
+                                              label, separator, args.bump, expected=expected):
                     if version:
                         print(f"Processed version {version} in file : '{filename}'")
                     else:
                         print(f"Could not process '{filename}'")
+            if _report_incomplete(cmd_runner) or cmd_runner.errors:
+                sys.exit(1)
 
         else:
             print(f"{args.bump} is not a valid version field, choose one of {Version.FIELDS}")
             sys.exit(1)
 
+    if args.reserve is not None:
+        from .allocator import BuildNumberAllocator
+        for filename in args.filenames:
+            with BuildNumberAllocator(filename, args.counter, args.label, args.separator) as allocator:
+                for v in allocator.versions(args.reserve):
+                    print(v.bare_version if args.bareversion else v)
+
+    if args.history:
+        from .history import version_history, version_changes
+        for filename in args.filenames:
+            if args.tags:
+                history = version_history(filename, args.label, args.separator, tags=True)
+            else:
+                history = version_changes(filename, args.label, args.separator, args.rev)
+            for ref, v in history:
+                if v:
+                    print(f"{filename} {ref} {v.bare_version if args.bareversion else v}")
+
+    if args.merge:
+        from .consistency import ConsistencyResult
+        try:
+            kind, merged = shard.merge(args.merge)
+        except shard.ShardError as e:
+            parser.error(str(e))
+        if args.check_consistent:
+            if kind != "ndjson":
+                parser.error("--check-consistent can only merge NDJSON results")
+            _report_consistency(ConsistencyResult.from_records(merged), args.ndjson)
+        elif kind == "manifest":
+            manifest.write(sys.stdout, merged)
+        else:
+            for r in merged:
+                print(json.dumps(r))
+    elif args.check_consistent:
+        from .consistency import check_consistent
+        targets = [(f, label, separator) for files, label, separator
+                   in _batches(filenames, config, args.label, args.separator) for f in files]
+        result = check_consistent(targets, args.label, args.separator, args.fail_fast, args.workers, file_filter)
+        for filename, v in reused.items():
+            result.add(filename, v)
+        _report_consistency(result, args.ndjson)
+
+    if args.snapshot:
+        root = args.filenames[0] if args.filenames else "."
+        paths = None
+        if args.shard:
+            paths = shard.select(manifest.discover(root), shard_index, shard_total)
+        count = manifest.snapshot(root, args.snapshot, [args.label], args.separator, paths=paths,
+                                  file_filter=file_filter)
+        print(f"Recorded {count} version lines under '{root}' in '{args.snapshot}'")
+
+    if args.diff:
+        for c in manifest.diff(*args.diff):
+            if c.kind == "added":
+                print(f"+ {c.path} {c.lhs} {c.new.bare_version}")
+            elif c.kind == "removed":
+                print(f"- {c.path} {c.lhs} {c.old.bare_version}")
+            else:
+                print(f"~ {c.path} {c.lhs} {c.old.bare_version} -> {c.new.bare_version}")
+
     if args.update:
-        cmd_runner = OperationRunner(UpdateCommand())
-        for cmd in cmd_runner(args.filename, version, args.label):
-            for filename, lines in cmd.items():
-                print(f"Processed {version} in {filename} at lines {lines}")
+        cmd_runner = OperationRunner(UpdateCommand(journal, args.dry_run, dedup), metrics, tracer,
+                                     timeout=args.timeout, deadline=args.deadline)
+        for files, label, separator in _batches(filenames, config, args.label, args.separator):
+            for filename, lines in _run(cmd_runner, files, args.window, args.workers, version, label, separator):
+                if args.dry_run:
+                    print(f"Would update {version} in {filename} at lines {lines}")
+                else:
+                    print(f"Processed {version} in {filename} at lines {lines}")
+        if _report_incomplete(cmd_runner):
+            sys.exit(1)
+
+    if journal and (args.show_journal or args.crossed):
+        if args.crossed:
+            threshold = Version.parse_version(args.crossed, lhs=args.label)
+            entries = [journal.crossed(threshold, f) for f in args.filenames] if args.filenames \
+                else [journal.crossed(threshold)]
+        elif args.filenames:
+            entries = [e for f in args.filenames for e in journal.bumps(f)]
+        else:
+            entries = journal.entries()
+        for e in entries:
+            if e:
+                when = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(e.timestamp))
+                print(f"{when} {e.filename} {e.lhs} {e.old.bare_version} -> {e.new.bare_version}")
+
+    if file_filter and file_filter.summary():
+        print(file_filter.summary(), file=sys.stderr if args.ndjson else sys.stdout)
+
+    if journal:
+        journal.close()
+
+    if metrics:
+        if dedup:
+            metrics.incr("dedup_hits", dedup.hits)
+            metrics.incr("dedup_misses", dedup.misses)
+        metrics.flush()
+
+    if tracer:
+        tracer.export(args.trace)
 
 
 if __name__ == "__main__":
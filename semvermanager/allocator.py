@@ -0,0 +1,144 @@
+"""
+Atomic allocation of `tag_version` build numbers.
+
+`--bump tag_version` rewrites the version file on every call, and two
+workers bumping at the same moment can be handed the same number. A
+`BuildNumberAllocator` instead keeps the last number handed out in a small
+counter file beside the version file and reserves numbers under an
+exclusive lock. A reservation is one locked read and write of a
+24 byte record, so a single machine can hand out thousands of numbers
+a second without ever repeating one.
+
+The counter record also holds the MAJOR.MINOR.PATCH-TAG it was counting
+for. When the version file moves on (a patch bump, say) the counter
+restarts from the `tag_version` in the version file. The base only ever
+moves forward: an allocator holding an older base than the counter
+re-reads the version file, and refuses to reserve if that is older still,
+so a stale allocator can never restart the count and reissue numbers.
+"""
+
+import os
+import struct
+import threading
+
+from . import Version, VersionError
+
+try:
+    import fcntl
+except ImportError:  # Windows, only the in-process lock applies
+    fcntl = None
+
+
+class BuildNumberAllocator:
+    """
+    Reserve build numbers for the version in `filename`::
+
+        with BuildNumberAllocator("VERSION") as allocator:
+            v = allocator.next_version()  # e.g. VERSION = '1.2.0-beta7'
+
+    :param filename: the version file holding the base version
+    :param counter_file: where to keep the counter [default: `filename`.buildno]
+    :param lhs: the version label
+    :param separator: the label separator
+    """
+
+    RECORD = struct.Struct("<IIIIQ")  # major, minor, patch, tag index, last number issued
+
+    def __init__(self, filename, counter_file=None, lhs="VERSION", separator="="):
+        self._filename = filename
+        self._lhs = lhs
+        self._separator = separator
+        self._load()
+        self._counter_file = counter_file if counter_file else filename + ".buildno"
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        Read the base version from the version file.
+        """
+        version = Version.find(self._filename, self._lhs, self._separator)
+        if version is None:
+            raise VersionError(f"No label or version in {self._filename}")
+        if version.tag == "":
+            raise VersionError(f"tag is not 'alpha' or 'beta' in {self._filename}, no build numbers allowed")
+
+        tag_index = list(Version.TAGS.values()).index(version.tag)
+        self._version = version
+        self._base = (version.major, version.minor, version.patch, tag_index)
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def counter_file(self):
+        return self._counter_file
+
+    def open(self):
+        if self._fd is None:
+            self._fd = os.open(self._counter_file, os.O_RDWR | os.O_CREAT, 0o644)
+        return self
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def reserve(self, n=1):
+        """
+        Atomically reserve the next `n` build numbers.
+
+        :param n: how many numbers to reserve
+        :return: a `range` of the reserved numbers
+        """
+        if n < 1:
+            raise VersionError(f"Must reserve at least one build number not {n}")
+        self.open()
+        fd = self._fd
+        with self._lock:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                data = os.read(fd, self.RECORD.size)
+                last = self._version.tag_version
+                if len(data) == self.RECORD.size:
+                    *base, counted = self.RECORD.unpack(data)
+                    base = tuple(base)
+                    if base > self._base:  # the version file has moved on since we read it
+                        self._load()
+                        last = self._version.tag_version
+                        if base > self._base:
+                            raise VersionError(f"{self._filename} holds {self._version}, older than "
+                                               f"the version {self._counter_file} is counting for")
+                    if base == self._base:
+                        last = max(last, counted)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, self.RECORD.pack(*self._base, last + n))
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        return range(last + 1, last + n + 1)
+
+    def next_version(self):
+        """
+        :return: a new `Version` carrying the next build number as its `tag_version`
+        """
+        return self.versions(1)[0]
+
+    def versions(self, n=1):
+        """
+        :return: a list of `n` new `Version` objects with consecutive build numbers
+        """
+        numbers = self.reserve(n)
+        v = self._version  # after reserve, which may have re-read the version file
+        return [Version(v.major, v.minor, v.patch, v.tag, i, lhs=v.lhs, separator=v.separator)
+                for i in numbers]
@@ -0,0 +1,162 @@
+"""
+Cascade a bump through the dependency graph of a monorepo.
+
+When a package is bumped, every package that depends on it, directly or
+transitively, gets a `patch` bump (or whatever `dependent_field` is). A
+package reached by several routes gets the most significant of the bumps
+asked of it, so a package bumped `minor` as a root is not also bumped
+`patch` as a dependent. The graph comes from the `depends` lists of a
+project config (see `semvermanager.config`).
+
+`plan` reads the current versions and works out the whole cascade without
+writing anything. The bumps are grouped into levels in topological order:
+level 0 holds packages whose dependencies are not bumped, and level n
+holds packages whose bumped dependencies are all in levels below n.
+`execute` runs the levels in order and the bumps within a level in
+parallel. Each bump is a compare-and-swap against the version read at
+planning time, so a file changed in between is reported rather than
+overwritten. A level with a failure stops the cascade.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import copy
+
+from . import Version, VersionError
+
+PlannedBump = namedtuple("PlannedBump", ["name", "path", "field", "old", "new"])
+
+
+class CascadeError(VersionError):
+    pass
+
+
+def _stronger(a, b):
+    """:return: the more significant of two `Version.FIELDS`"""
+    return a if Version.FIELDS.index(a) <= Version.FIELDS.index(b) else b
+
+
+def dependents(graph):
+    """
+    :param graph: a dict mapping each name to the names it depends on
+    :return: a dict mapping each name to the names that depend on it
+    """
+    reverse = {name: [] for name in graph}
+    for name, deps in graph.items():
+        for d in deps:
+            reverse[d].append(name)
+    return reverse
+
+
+def cascade(graph, roots, dependent_field="patch"):
+    """
+    Work out which field to bump in every package affected by `roots`.
+
+    :param graph: a dict mapping each name to the names it depends on
+    :param roots: a dict mapping each name bumped directly to its field
+    :param dependent_field: the field bumped in dependents
+    :return: a dict mapping every affected name to the field to bump
+    """
+    reverse = dependents(graph)
+    fields = {}
+    stack = []
+    for name, field in roots.items():
+        if name not in graph:
+            raise CascadeError(f"Unknown package '{name}'")
+        fields[name] = _stronger(field, fields[name]) if name in fields else field
+        stack.append(name)
+    seen = set()
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        for d in reverse[name]:
+            fields[d] = _stronger(dependent_field, fields[d]) if d in fields else dependent_field
+            stack.append(d)
+    return fields
+
+
+def levels(graph, names):
+    """
+    Split `names` into topological levels of `graph`, considering only the
+    dependencies that are themselves in `names`.
+
+    :return: a list of lists of names, each sorted
+    :raises CascadeError: if `names` contains a dependency cycle
+    """
+    names = set(names)
+    pending = {n: {d for d in graph[n] if d in names} for n in names}
+    result = []
+    while pending:
+        ready = sorted(n for n, deps in pending.items() if not deps)
+        if not ready:
+            raise CascadeError(f"Dependency cycle between {', '.join(sorted(pending))}")
+        result.append(ready)
+        for n in ready:
+            del pending[n]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return result
+
+
+def plan(config, roots, dependent_field="patch"):
+    """
+    Plan a cascading bump without changing any files.
+
+    :param config: a `semvermanager.config.Config`
+    :param roots: a dict mapping each package name or path bumped directly to its field
+    :param dependent_field: the field bumped in dependents
+    :return: a list of levels, each a list of `PlannedBump`
+    """
+    named = {}
+    for name, field in roots.items():
+        f = config.file(name)
+        if f is None:
+            raise CascadeError(f"'{name}' is not in '{config.filename}'")
+        if field not in Version.FIELDS:
+            raise CascadeError(f"'{field}' is not one of {Version.FIELDS}")
+        named[f.name] = field
+    graph = config.graph()
+    fields = cascade(graph, named, dependent_field)
+    result = []
+    for level in levels(graph, fields):
+        planned = []
+        for name in level:
+            f = config.file(name)
+            old = f.find()
+            if old is None:
+                raise CascadeError(f"No version in '{f.path}'")
+            new = copy.copy(old)
+            new.bump(fields[name])
+            planned.append(PlannedBump(name, f.path, fields[name], old, new))
+        result.append(planned)
+    return result
+
+
+def execute(config, planned, journal=None, workers=None):
+    """
+    Apply a plan from `plan` level by level.
+
+    :return: a tuple (bumped, errors) where bumped is a list of `PlannedBump`
+        that were applied and errors is a list of (`PlannedBump`, exception)
+    """
+    bumped = []
+    errors = []
+
+    def run(p):
+        config.file(p.name).bump(p.field, expected=p.old, journal=journal)
+        return p
+
+    with ThreadPoolExecutor(workers) as pool:
+        for level in planned:
+            futures = [(p, pool.submit(run, p)) for p in level]
+            for p, future in futures:
+                try:
+                    bumped.append(future.result())
+                except (VersionError, OSError) as e:
+                    errors.append((p, e))
+            if errors:
+                break
+    return bumped, errors
@@ -0,0 +1,49 @@
+"""
+Result channels carry results from an `Operation` to whoever consumes
+them.
+
+`LocalChannel` is a plain `collections.deque` with no locking. Each
+operation gets its own channel, which only one thread uses at a time, so
+no synchronisation is needed.
+
+It keeps the `put`/`get`/`empty` methods of `queue.Queue` so code
+written against the old queues keeps working.
+"""
+
+import queue
+from collections import deque
+
+
+class LocalChannel:
+    """
+    An unbounded, unsynchronised channel for single threaded runs.
+    """
+
+    def __init__(self):
+        self._items = deque()
+
+    def put(self, item):
+        self._items.append(item)
+
+    def get(self):
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise queue.Empty
+
+    def empty(self):
+        return not self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def drain(self):
+        """
+        Yield every result currently in the channel, removing each one.
+        """
+        items = self._items
+        while items:
+            yield items.popleft()
+
+    def close(self):
+        pass
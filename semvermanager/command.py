@@ -1,6 +1,13 @@
 
+import copy
 import os
-import queue
+import threading
+import time
+from collections import deque
+
+from .channel import LocalChannel
+from .metrics import NULL_METRICS
+from .tracing import NULL_TRACER
 
 
 class CommandError(ValueError):
@@ -9,30 +16,94 @@ class CommandError(ValueError):
 class OperationError(ValueError):
     pass
 
+class OperationTimeout(CommandError):
+    pass
+
+
+class Commit:
+    """
+    Settles, once, the race between a write finishing and its runner
+    giving up on it.
+
+    A write passes its `Commit` to `Version._swap`, which calls `claim`
+    just before the new file replaces the old one and only replaces it if
+    the claim succeeds. A runner whose call overruns calls `abandon`. If
+    the write has already claimed, the runner waits for it to finish
+    instead, so a file reported as timed out is never changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None  # "claimed" or "abandoned"
+
+    def claim(self):
+        """
+        :return: True if the write may go ahead
+        """
+        with self._lock:
+            if self._state is None:
+                self._state = "claimed"
+            return self._state == "claimed"
+
+    def abandon(self):
+        """
+        :return: True if the write will now never happen, False if it has been claimed
+        """
+        with self._lock:
+            if self._state is None:
+                self._state = "abandoned"
+            return self._state == "abandoned"
+
+
 class Operation:
+
+    metrics = NULL_METRICS
+    tracer = NULL_TRACER
+    commit = None  # a `Commit` when a runner may abandon the call
+
     def __init__(self, name=None, q=None):
         if name:
             self._name = name
         else:
-            self._name = __class__.__qualname__
+            self._name = self.__class__.__qualname__
 
         if q:
             self._q = q
         else:
-            self._q = queue.Queue()
+            self._q = LocalChannel()
 
     @property
     def q(self):
         return self._q
 
+    @property
+    def name(self):
+        return self._name
+
+    def fork(self):
+        """
+        :return: a shallow copy of this operation with its own empty channel
+        """
+        op = copy.copy(self)
+        op._q = LocalChannel()
+        return op
+
     def print_queue(self):
         for item in self.q.items():
             print(item)
 
     def items(self):
-        while not self.q.empty():
-            item = self.q.get()
-            yield item
+        q = self.q
+        if hasattr(q, "drain"):
+            n = 0
+            for n, item in enumerate(q.drain(), 1):
+                yield item
+            self.metrics.incr("results", n)
+        else:  # a plain queue.Queue supplied by the caller
+            while not q.empty():
+                with self.metrics.timer("dequeue"):
+                    item = q.get()
+                yield item
 
 
 class QueryError(ValueError):
@@ -45,12 +116,12 @@ class Query(Operation):
         if name:
             self._name = name
         else:
-            self._name = __class__.name
+            self._name = self.__class__.__qualname__
 
         if q:
             self._q = q
         else:
-            self._q = queue.SimpleQueue()
+            self._q = LocalChannel()
 
     def __call__(self, *args, **kwargs):
         return self
@@ -63,8 +134,7 @@ class Command(Operation):
         pass
 
     def __init__(self, name=None, q=None):
-        super().__init__(q)
-
+        super().__init__(name, q)
 
     def __call__(self, *args, **kwargs):
         """
@@ -75,15 +145,11 @@ class Command(Operation):
         """
         return self
 
-    @property
-    def name(self):
-        return self._name
-
 
 class EchoCommand(Command):
 
     def __init__(self, name=None, q=None):
-        super().__init__(q)
+        super().__init__(name, q)
         if name:
             self._name = name
         else:
@@ -109,21 +175,253 @@ class StatCommand(Command):
 
 
 class OperationRunner:
-
-    def __init__(self, op):
+    """
+    Run operations over a list of files.
+
+    With a `timeout` or a `deadline`, each call runs in a daemon thread on
+    a `fork` of its operation. A call that overruns is abandoned, so a file
+    that hangs, e.g. on a dead network mount, can't stall the run, and any
+    result it produces later goes to a channel nobody reads. The fork is
+    given a `Commit`, which write operations pass on to the write: an
+    abandoned write stops before it replaces the file and removes its
+    temporary file, and a write already replacing the file when its time
+    runs out is waited for rather than reported as timed out. Once the
+    deadline has passed, or `cancel` has been called, the remaining files
+    are not started. Files already taken from the listing are counted in
+    `cancelled`, and the rest of the listing is left unread, so cancelling
+    a run over a large or endless lazy listing costs no time or memory.
+    `stopped_early` then tells that `cancelled` is only a lower bound.
+
+    :param op: the first `Operation`
+    :param metrics: a `Metrics` object
+    :param tracer: a `Tracer`
+    :param quiet: record errors without printing them
+    :param timeout: seconds allowed for each call
+    :param deadline: seconds allowed for all the runs, from the start of the first
+    :param file_filter: a `semvermanager.sniff.FileFilter`; files it rejects
+        are listed in `skipped` and never passed to an operation
+    """
+
+    def __init__(self, op, metrics=None, tracer=None, quiet=False, timeout=None, deadline=None, file_filter=None):
         self._commands = {}
+        self._quiet = quiet
+        self._metrics = metrics if metrics else NULL_METRICS
+        self._tracer = tracer if tracer else NULL_TRACER
+        self._timeout = timeout
+        self._deadline = deadline
+        self._end = None  # set when the first run starts, later runs share the deadline
+        self._filter = file_filter
+        self._skipped = []
+        self._cancel = threading.Event()
+        self._errors = []
+        self._timed_out = []
+        self._cancelled = 0
+        self._stopped_early = False
+        self._lock = threading.Lock()  # guards _cancelled for stream workers
         self.add(op)
 
+    @property
+    def errors(self):
+        """A list of (operation name, file, CommandError) for each failed dispatch"""
+        return self._errors
+
+    @property
+    def timed_out(self):
+        """A list of (operation name, file) for each call that overran its timeout"""
+        return self._timed_out
+
+    @property
+    def skipped(self):
+        """The files rejected by the file filter"""
+        return self._skipped
+
+    @property
+    def cancelled(self):
+        """
+        The number of files that were taken from a listing but not started
+        because of the deadline, `cancel`, or a stream being closed early
+        """
+        return self._cancelled
+
+    @property
+    def stopped_early(self):
+        """True if a run gave up with the rest of its listing unread, so `cancelled` is a lower bound"""
+        return self._stopped_early
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def tracer(self):
+        return self._tracer
+
+    def cancel(self):
+        """Stop starting new calls. May be called from any thread."""
+        self._cancel.set()
+
     def add(self, op):
         if isinstance(op, Operation):
+            op.metrics = self._metrics
+            op.tracer = self._tracer
             self._commands[op.name] = op
         else:
             raise OperationError(f"{op} is not an instance of Operation")
 
+    @staticmethod
+    def _call_with_timeout(cmd, timeout, i, args, kwargs):
+        op = cmd.fork()
+        op.commit = Commit()
+        outcome = []
+
+        def work():
+            try:
+                outcome.append((True, op(i, *args, **kwargs)))
+            except BaseException as e:
+                outcome.append((False, e))
+
+        worker = threading.Thread(target=work, name=f"{op.name}:{i}", daemon=True)
+        worker.start()
+        worker.join(timeout)
+        if not outcome:
+            if op.commit.abandon():
+                raise OperationTimeout(f"'{i}' did not finish within {timeout:.3g}s")
+            worker.join()  # past the point of no return, let the write finish
+        ok, value = outcome[0]
+        if not ok:
+            raise value
+        return value
+
+    def _budget(self):
+        """
+        :return: the time allowed for the next call, None for no limit, or
+            0 if no more calls should be started
+        """
+        timeout = self._timeout
+        if self._end is not None:
+            remaining = self._end - time.monotonic()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        if self._cancel.is_set() or (timeout is not None and timeout <= 0):
+            return 0
+        return timeout
+
+    def _start(self):
+        if self._deadline is not None and self._end is None:
+            self._end = time.monotonic() + self._deadline
+
+    def _skip(self, n=1, stop=False):
+        """
+        Count `n` files that will not be started. With `stop`, the rest of
+        the listing is abandoned unread.
+        """
+        with self._lock:
+            self._cancelled += n
+            self._stopped_early = self._stopped_early or stop
+        self._metrics.incr("cancelled", n)
+
+    def _rejected(self, i):
+        if self._filter is not None and self._filter.skip(i):
+            self._skipped.append(i)
+            self._metrics.incr("skipped")
+            return True
+        return False
+
+    def _dispatch(self, name, cmd, i, timeout, args, kwargs, fork=False):
+        """
+        Run one operation on one file, recording any failure.
+
+        :return: a tuple (ok, result)
+        """
+        try:
+            with self._metrics.timer("dispatch"), self._tracer.span("OperationRunner.dispatch", op=name, path=i):
+                if self._timeout is not None or self._deadline is not None:
+                    return True, self._call_with_timeout(cmd, timeout, i, args, kwargs)
+                return True, (cmd.fork() if fork else cmd)(i, *args, **kwargs)
+        except OperationTimeout as e:
+            self._metrics.incr("timeouts")
+            self._timed_out.append((name, i))
+            if not self._quiet:
+                print(f"TIMEOUT: command '{name}' : {e}")
+        except CommandError as e:
+            self._metrics.incr("errors")
+            self._errors.append((name, i, e))
+            if not self._quiet:
+                print(f"ERROR: command '{name}' : {e}")
+        return False, None
+
     def __call__(self, files, *args, **kwargs):
+        self._start()
+        files = iter(files)
         for i in files:
+            timeout = self._budget()
+            if timeout == 0:
+                self._skip(stop=True)  # counts i, the rest of files is never read
+                break
+            if self._rejected(i):
+                continue
+            self._metrics.incr("files")
             for name, cmd in self._commands.items():
-                try:
-                    yield cmd(i, *args, **kwargs)
-                except CommandError as e:
-                    print(f"ERROR: command '{name}' : {e}")
+                ok, result = self._dispatch(name, cmd, i, timeout, args, kwargs)
+                if ok:
+                    yield result
+
+    def _run_file(self, i, args, kwargs):
+        timeout = self._budget()  # the clock starts when a worker picks the file up, not when it was queued
+        if timeout == 0:
+            self._skip()
+            return []
+        if self._rejected(i):
+            return []
+        self._metrics.incr("files")
+        items = []
+        for name, cmd in self._commands.items():
+            ok, result = self._dispatch(name, cmd, i, timeout, args, kwargs, fork=True)
+            if ok:
+                items.extend(result.items() if isinstance(result, Operation) else [result])
+        return items
+
+    def stream(self, files, *args, window=64, workers=None, **kwargs):
+        """
+        Like `results`, but run up to `window` files at once on `workers`
+        threads, still yielding results in the order of `files`.
+
+        `files` is consumed lazily, e.g. straight from
+        `semvermanager.manifest.discover`, and a new file is only started
+        when the caller has taken the results of the oldest one in flight.
+        Memory use therefore depends on `window`, not on the number of
+        files, and a slow consumer holds the whole pipeline back. Each call
+        runs on a `fork` of its operation.
+
+        :param window: the maximum number of files in flight
+        :param workers: the number of threads [default: ThreadPoolExecutor's]
+        """
+        from concurrent.futures import ThreadPoolExecutor  # only streaming runs pay for the import
+        self._start()
+        pending = deque()
+        files = iter(files)
+        with ThreadPoolExecutor(workers) as pool:
+            try:
+                for i in files:
+                    if self._budget() == 0:
+                        self._skip(stop=True)  # counts i, the rest of files is never read
+                        break
+                    pending.append(pool.submit(self._run_file, i, args, kwargs))
+                    if len(pending) >= window:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                if pending:  # closed early, files in flight that had not started are cancelled
+                    self._skip(n=sum(1 for future in pending if future.cancel()), stop=True)
+
+    def results(self, files, *args, **kwargs):
+        """
+        Run the operations over `files` and yield each result directly,
+        draining an operation's channel as soon as it has run rather than
+        handing the operation back to the caller.
+        """
+        for op in self(files, *args, **kwargs):
+            if isinstance(op, Operation):
+                yield from op.items()
+            else:
+                yield op
@@ -0,0 +1,240 @@
+"""
+Project configuration, read from a `semver.toml` file, so that the
+version files of a project and their labels don't have to be repeated on
+every command line::
+
+    label = "VERSION"        # the defaults for every file
+    separator = "="
+
+    [[file]]
+    path = "setup.py"
+
+    [[file]]
+    path = "docs/conf.py"
+    label = "release"
+
+    [[file]]
+    path = "frontend/version.json"
+    format = "package.json"  # read it like a package.json
+    name = "frontend"
+    depends = ["core"]       # names of the files this one depends on
+
+File paths are relative to the directory holding the config file. A
+file's name defaults to its path, and `depends` declares the dependency
+graph used by `semvermanager.cascade`. A file's format is "auto" (chosen
+by file name, see `semvermanager.extractors`), "line" for a
+`LABEL <sep> 'x.y.z'` line, or the name of an extractor such as
+"pyproject.toml".
+
+`load` parses a config file once and compiles it, resolving each file's
+extractor up front. The compiled `Config` is cached by file name and
+reused until the file's mtime or size changes. A file with an explicit
+format is assigned its extractor (see `extractors.assign`) for as long as
+its `Config` is current. Recompiling a changed config, or calling
+`Config.release`, drops the assignments.
+
+TOML is parsed with `tomllib` (Python 3.11+) or the `tomli` package.
+"""
+
+import os
+from collections import OrderedDict
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from . import Version, VersionError
+from . import extractors
+
+DEFAULT_CONFIG = "semver.toml"
+
+FORMATS = ("auto", "line")
+
+_cache = {}  # absolute file name -> (mtime_ns, size, Config)
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class VersionFile:
+    """
+    One compiled `[[file]]` entry.
+
+    :param path: the file name
+    :param label: the version label
+    :param separator: the label separator
+    :param format: "auto", "line" or an extractor name
+    :param name: the name other entries use to depend on this one [default: `path`]
+    :param depends: the names of the entries this one depends on
+    """
+
+    def __init__(self, path, label="VERSION", separator="=", format="auto", name=None, depends=()):
+        self.path = path
+        self.label = label
+        self.separator = separator
+        self.format = format
+        self.name = name or path
+        self.depends = tuple(depends)
+        if format == "line":
+            self.extractor = None
+        elif format == "auto":
+            self.extractor = extractors.extractor_for(path)
+        else:
+            self.extractor = extractors.extractor_for(format)
+            if self.extractor is None:
+                raise ConfigError(f"'{path}' has unknown format '{format}', use one of "
+                                  f"{', '.join(FORMATS + tuple(extractors.REGISTRY))}")
+
+    def find(self):
+        """
+        :return: the `Version` in the file, or None if it has none
+        """
+        if self.extractor:
+            return self.extractor.find(self.path)
+        return Version.find(self.path, self.label, self.separator)
+
+    def bump(self, field, expected=None, journal=None):
+        """
+        Bump `field` of the version in the file, see `Version.bump_file`.
+
+        :return: the bumped `Version`
+        """
+        if self.extractor:
+            version, _ = self.extractor.bump(self.path, field, expected=expected, journal=journal)
+        else:
+            version, _ = Version.bump_file(self.path, field, self.label, self.separator,
+                                           expected=expected, journal=journal)
+        return version
+
+    def __repr__(self):
+        return f"{self.__class__.__qualname__}('{self.path}', '{self.label}', '{self.separator}', '{self.format}')"
+
+
+class Config:
+    """
+    A compiled project configuration.
+
+    :param data: the parsed TOML document
+    :param filename: the config file, which file paths are relative to
+    """
+
+    def __init__(self, data, filename=DEFAULT_CONFIG):
+        self.filename = filename
+        self.data = data
+        base = os.path.dirname(filename)
+        label = data.get("label", "VERSION")
+        separator = data.get("separator", "=")
+        self.files = []
+        for entry in data.get("file", []):
+            if "path" not in entry:
+                raise ConfigError(f"A [[file]] in '{filename}' has no path")
+            self.files.append(VersionFile(os.path.join(base, entry["path"]),
+                                          entry.get("label", label),
+                                          entry.get("separator", separator),
+                                          entry.get("format", "auto"),
+                                          entry.get("name", entry["path"]),
+                                          entry.get("depends", ())))
+        self._by_path = {os.path.normpath(f.path): f for f in self.files}
+        self._by_name = {f.name: f for f in self.files}
+        if len(self._by_name) != len(self.files):
+            raise ConfigError(f"'{filename}' has two files with the same name")
+        for f in self.files:
+            for d in f.depends:
+                if d not in self._by_name:
+                    raise ConfigError(f"'{f.name}' depends on '{d}', which is not in '{filename}'")
+        self._assigned = [f for f in self.files if f.format != "auto"]
+        for f in self._assigned:
+            extractors.assign(f.path, f.extractor)
+
+    def release(self):
+        """
+        Drop the extractor assignments made for this config's files.
+        """
+        for f in self._assigned:
+            extractors.unassign(f.path, f.extractor)
+        self._assigned = []
+
+    @property
+    def paths(self):
+        return [f.path for f in self.files]
+
+    def file(self, path):
+        """
+        :return: the `VersionFile` for `path` or name, or None if it is not configured
+        """
+        return self._by_name.get(path) or self._by_path.get(os.path.normpath(path))
+
+    def graph(self):
+        """
+        :return: a dict mapping each file name to the names it depends on
+        """
+        return {f.name: f.depends for f in self.files}
+
+    def groups(self, paths=None, label="VERSION", separator="="):
+        """
+        Group files by the label and separator they use.
+
+        :param paths: the files to group [default: every configured file].
+            Files that are not configured use `label` and `separator`.
+        :return: an OrderedDict mapping (label, separator) to a list of paths
+        """
+        groups = OrderedDict()
+        for path in self.paths if paths is None else paths:
+            f = self.file(path)
+            key = (f.label, f.separator) if f else (label, separator)
+            groups.setdefault(key, []).append(path)
+        return groups
+
+    def versions(self):
+        """
+        Yield (path, Version) for every configured file.
+        """
+        for f in self.files:
+            try:
+                yield f.path, f.find()
+            except (VersionError, OSError):
+                yield f.path, None
+
+
+def parse(text, filename=DEFAULT_CONFIG):
+    """
+    Compile the TOML `text` of a config file.
+
+    :raises ConfigError: if `text` is not valid or no TOML parser is installed
+    """
+    if tomllib is None:
+        raise ConfigError("Reading a config file needs Python 3.11 or the 'tomli' package")
+    try:
+        data = tomllib.loads(text)
+    except tomllib.TOMLDecodeError as e:
+        raise ConfigError(f"'{filename}': {e}")
+    return Config(data, filename)
+
+
+def load(filename=DEFAULT_CONFIG):
+    """
+    Return the compiled `Config` for `filename`, parsing and compiling it
+    only if it has changed since it was last loaded.
+
+    :raises ConfigError: if the file is missing or invalid
+    """
+    key = os.path.abspath(filename)
+    try:
+        st = os.stat(filename)
+    except OSError as e:
+        raise ConfigError(f"Can't read config file '{filename}': {e.strerror}")
+    cached = _cache.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    if cached:
+        del _cache[key]
+        cached[2].release()
+    with open(filename, "r") as file:
+        config = parse(file.read(), filename)
+    _cache[key] = (st.st_mtime_ns, st.st_size, config)
+    return config
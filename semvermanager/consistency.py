@@ -0,0 +1,143 @@
+"""
+Check that a set of files all agree on one version.
+
+Files are read in parallel and their versions are compared by their
+bare version strings, which, unlike packed keys, hold any field size. In fail-fast mode the check stops at the first
+file that disagrees and cancels the reads still outstanding. Otherwise
+every file is read and the files are reported grouped by the version
+they hold.
+
+The exit codes are suitable for pre-commit hooks:
+
+* 0 all files agree
+* 1 the files hold different versions
+* 2 a file is missing or has no parseable version
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import Version, VersionError
+from .extractors import extractor_for
+from . import shard
+
+CONSISTENT = 0
+INCONSISTENT = 1
+ERROR = 2
+
+
+class ConsistencyResult:
+
+    def __init__(self):
+        self.groups = {}  # bare version -> list of filenames
+        self.errors = {}  # filename -> error message
+        self.stopped_early = False
+        self._versions = {}  # bare version -> the first Version seen
+
+    def add(self, filename, version):
+        key = version.bare_version
+        self._versions.setdefault(key, version)
+        self.groups.setdefault(key, []).append(filename)
+
+    @staticmethod
+    def from_records(records):
+        """
+        Rebuild a result from NDJSON records (see `semvermanager.shard`),
+        e.g. the merged output of a check split across several machines.
+
+        :param records: dicts with a "path" and either a "version" or an "error"
+        """
+        result = ConsistencyResult()
+        for r in records:
+            path = r["path"]
+            if r.get("error") is not None:
+                result.errors[path] = r["error"]
+            elif r.get("version") is None:
+                result.errors[path] = f"No version in '{path}'"
+            else:
+                try:
+                    result.add(path, Version.parse_version(r["version"]))
+                except VersionError as e:
+                    result.errors[path] = str(e)
+        return result
+
+    def records(self):
+        """
+        :return: the result as NDJSON records, ordered by path
+        """
+        found = [(f, self._versions[k]) for k, files in self.groups.items() for f in files]
+        lines = [shard.record(f, version=v) for f, v in found]
+        lines.extend(shard.record(f, error=e) for f, e in self.errors.items())
+        return sorted(lines)
+
+    @property
+    def consistent(self):
+        return len(self.groups) <= 1 and not self.errors
+
+    @property
+    def exit_code(self):
+        if self.errors:
+            return ERROR
+        if len(self.groups) > 1:
+            return INCONSISTENT
+        return CONSISTENT
+
+    def versions(self):
+        """
+        :return: a list of (Version, filenames) pairs, the most common version first
+        """
+        return [(self._versions[k], files)
+                for k, files in sorted(self.groups.items(), key=lambda kv: -len(kv[1]))]
+
+
+def _read(target):
+    filename, lhs, separator = target
+    if not os.path.isfile(filename):
+        raise VersionError(f"No such file: '{filename}'")
+    extractor = extractor_for(filename)
+    v = extractor.find(filename) if extractor else Version.find(filename, lhs, separator)
+    if v is None:
+        raise VersionError(f"No '{lhs}' version in '{filename}'")
+    return v
+
+
+def check_consistent(filenames, lhs="VERSION", separator="=", fail_fast=False, workers=None, file_filter=None):
+    """
+    Check that every file holds the same version.
+
+    :param filenames: file names, or (filename, lhs, separator) tuples for
+        files that use a different label
+    :param lhs: the default version label
+    :param separator: the default label separator
+    :param fail_fast: stop at the first disagreement or error
+    :param workers: number of reader threads [default: ThreadPoolExecutor's]
+    :param file_filter: a `semvermanager.sniff.FileFilter`. A file it
+        rejects is not read and is reported as an error, as a file that
+        can't be checked can't be vouched for.
+    :return: a `ConsistencyResult`
+    """
+    targets = [f if isinstance(f, tuple) else (f, lhs, separator) for f in filenames]
+    result = ConsistencyResult()
+    if file_filter is not None:
+        kept = []
+        for t in targets:
+            why = file_filter.skip(t[0])
+            if why:
+                result.errors[t[0]] = f"Skipped '{t[0]}', {why}"
+            else:
+                kept.append(t)
+        targets = kept
+    with ThreadPoolExecutor(workers) as pool:
+        futures = {pool.submit(_read, t): t[0] for t in targets}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                result.add(filename, future.result())
+            except (VersionError, OSError) as e:
+                result.errors[filename] = str(e)
+            if fail_fast and not result.consistent:
+                result.stopped_early = not all(f.done() for f in futures)
+                for f in futures:
+                    f.cancel()
+                break
+    return result
@@ -0,0 +1,150 @@
+"""
+Convert versions to and from the forms other packaging ecosystems use.
+
+===========  ===============  ==================
+style        example          tag spelling
+===========  ===============  ==================
+"semver"     1.2.3-alpha1     `Version.bare_version`
+"pep440"     1.2.3a1          PEP 440, "a" and "b"
+"npm"        1.2.3-alpha.1    SemVer with a dot separated tag number
+===========  ===============  ==================
+
+The PEP 440 tag letters are derived from `Version.TAGS`, so every
+`Version` survives a round trip through every style unchanged, including
+a tag version of 0 (`1.2.3a0`).
+
+`render_many` and `parse_many` convert whole columns. Both convert each
+distinct value only once, so a column of a million versions drawn from a
+few thousand releases costs a few thousand conversions and a dict lookup
+per row. `render_many` keys `Version` objects on their bare version, so
+it also takes versions with a field too large to pack. `parse_many`
+returns one shared `Version` for each distinct string, or with
+`packed=True` the packed ints (see `Version.pack`), which can be stored
+with `Version.pack_many`.
+"""
+
+import re
+import struct
+
+from . import Version, VersionError
+
+STYLES = ("semver", "pep440", "npm")
+
+PEP440_TAGS = {tag: tag[:1] for tag in Version.TAGS.values()}  # "alpha" -> "a", "beta" -> "b"
+
+_FROM_PEP440 = {letter: tag for tag, letter in PEP440_TAGS.items()}
+
+_NUMBER = r"(0|[1-9]\d*)"
+_PATTERNS = {
+    "semver": re.compile(rf"{_NUMBER}\.{_NUMBER}\.{_NUMBER}(?:-(alpha|beta)(\d+))?\Z"),
+    "pep440": re.compile(rf"{_NUMBER}\.{_NUMBER}\.{_NUMBER}(?:(a|b)(\d*))?\Z"),
+    "npm": re.compile(rf"{_NUMBER}\.{_NUMBER}\.{_NUMBER}(?:-(alpha|beta)\.(\d+))?\Z"),
+}
+
+
+def _check_style(style):
+    if style not in STYLES:
+        raise VersionError(f"'{style}' is not a version style, use one of {', '.join(STYLES)}")
+
+
+def _format(major, minor, patch, tag, tag_version, style):
+    release = f"{major}.{minor}.{patch}"
+    if not tag:
+        return release
+    if style == "pep440":
+        return f"{release}{PEP440_TAGS[tag]}{tag_version}"
+    if style == "npm":
+        return f"{release}-{tag}.{tag_version}"
+    return f"{release}-{tag}{tag_version}"
+
+
+def _fields(text, style):
+    match = _PATTERNS[style].match(text.strip())
+    if not match:
+        raise VersionError(f"'{text}' is not a {style} version")
+    major, minor, patch, tag, tag_version = match.groups()
+    if style == "pep440":
+        tag = _FROM_PEP440[tag] if tag else ""
+    return int(major), int(minor), int(patch), tag or "", int(tag_version) if tag_version else 0
+
+
+def render(version, style="pep440"):
+    """
+    :param version: a `Version`
+    :param style: one of `STYLES`
+    :return: `version` as a string in `style`
+    """
+    _check_style(style)
+    return _format(version.major, version.minor, version.patch, version.tag, version.tag_version, style)
+
+
+def parse(text, style="pep440", lhs="VERSION", separator="="):
+    """
+    :param text: a version string in `style`, e.g. "1.2.3b2"
+    :return: a new `Version`
+    :raises VersionError: if `text` is not a `style` version or has a tag
+        that `Version` does not support, such as "rc"
+    """
+    _check_style(style)
+    major, minor, patch, tag, tag_version = _fields(text, style)
+    return Version(major, minor, patch, tag, tag_version, lhs=lhs, separator=separator)
+
+
+def to_pep440(version):
+    return render(version, "pep440")
+
+
+def from_pep440(text, lhs="VERSION", separator="="):
+    return parse(text, "pep440", lhs, separator)
+
+
+def to_npm(version):
+    return render(version, "npm")
+
+
+def from_npm(text, lhs="VERSION", separator="="):
+    return parse(text, "npm", lhs, separator)
+
+
+def _render_key(key, style):
+    version = Version.unpack(key) if isinstance(key, int) else parse(key, "semver")
+    return _format(version.major, version.minor, version.patch, version.tag, version.tag_version, style)
+
+
+def render_many(column, style="pep440"):
+    """
+    Render a column of versions.
+
+    :param column: an iterable of `Version` objects or of packed ints from
+        `Version.pack`, or the bytes returned by `Version.pack_many`
+    :param style: one of `STYLES`
+    :return: a list of strings
+    :raises VersionError: for an int that is not a packed version
+    """
+    _check_style(style)
+    if isinstance(column, (bytes, bytearray, memoryview)):
+        column = struct.unpack(f">{len(column) // 8}Q", column)
+    keys = [item if isinstance(item, int) else item.bare_version for item in column]
+    memo = {key: _render_key(key, style) for key in dict.fromkeys(keys)}
+    return list(map(memo.__getitem__, keys))
+
+
+def parse_many(column, style="pep440", packed=False, lhs="VERSION", separator="="):
+    """
+    Parse a column of version strings.
+
+    :param column: an iterable of strings in `style`
+    :param style: one of `STYLES`
+    :param packed: return packed ints (see `Version.pack`) rather than `Version` objects
+    :return: a list of packed ints, or of `Version` objects. Rows holding
+        the same string share one `Version`, copy it before modifying it.
+    :raises VersionError: on the first string that is not a `style` version,
+        or with `packed`, that has a field too large to pack
+    """
+    _check_style(style)
+    column = column if isinstance(column, (list, tuple)) else list(column)
+    memo = {}
+    for text in dict.fromkeys(column):
+        version = parse(text, style, lhs, separator)
+        memo[text] = version.pack() if packed else version
+    return list(map(memo.__getitem__, column))
@@ -0,0 +1,122 @@
+"""
+Parse each distinct file content once.
+
+Vendored and generated trees often hold thousands of byte identical
+version files. A `ContentCache` hashes each file with BLAKE2b and keeps
+the parsed result per digest, so every later file with the same content
+gets a copy of that result instead of being parsed again. This applies to
+`find` and to the line numbers a dry run `Version.update` would replace.
+
+Digests are also remembered per path against the file's mtime, size and
+inode, so a file seen before in the same process is not even re-read
+while it is unchanged.
+
+A cache may be shared by the worker threads of one run. Its tables are
+guarded by a lock that is never held while a file is read or parsed, so
+two threads that meet the same new content at once may both parse it.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+
+from . import Version
+from .metrics import NULL_METRICS
+from .tracing import NULL_TRACER
+
+
+class ContentCache:
+    """
+    :param digest_size: the BLAKE2b digest size in bytes
+    """
+
+    def __init__(self, digest_size=16):
+        self._digest_size = digest_size
+        self._signatures = {}  # path -> ((mtime_ns, size, inode), digest)
+        self._results = {}  # (digest, kind, lhs, separator) -> result
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, filename, metrics=NULL_METRICS):
+        """
+        :return: a tuple (digest, contents), where contents is None if the
+            digest was known and the file was not read
+        """
+        st = os.stat(filename)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            known = self._signatures.get(filename)
+        if known and known[0] == stamp:
+            return known[1], None
+        with metrics.timer("open"):
+            with open(filename, "rb") as file:
+                data = file.read()
+        digest = hashlib.blake2b(data, digest_size=self._digest_size).digest()
+        with self._lock:
+            self._signatures[filename] = (stamp, digest)
+        return digest, data
+
+    def signature(self, filename):
+        """
+        :return: the BLAKE2b digest of the contents of `filename`
+        """
+        return self._load(filename)[0]
+
+    def _lookup(self, filename, kind, lhs, separator, compute, metrics, tracer):
+        with tracer.span(f"ContentCache.{kind}", path=filename) as span:
+            digest, data = self._load(filename, metrics)
+            key = (digest, kind, lhs, separator)
+            with self._lock:
+                hit = key in self._results
+                if hit:
+                    result = self._results[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            span.set("hit", hit)
+            if not hit:
+                if data is None:
+                    with metrics.timer("open"):
+                        with open(filename, "rb") as file:
+                            data = file.read()
+                with metrics.timer("parse"):
+                    result = compute(data.decode("utf-8", errors="replace"))
+                with self._lock:
+                    self._results[key] = result
+        return copy.copy(result)
+
+    def find(self, filename, lhs="VERSION", separator="=", metrics=NULL_METRICS, tracer=NULL_TRACER):
+        """
+        As `Version.find`, parsing each distinct content only once.
+
+        :return: a new `Version`, or None if there is no `lhs` line
+        """
+        def compute(text):
+            for line in text.splitlines():
+                line = line.strip()
+                if line.startswith(lhs):
+                    metrics.incr("lines_matched")
+                    return Version.parse_version(line, lhs=lhs, separator=separator)
+            return None
+
+        return self._lookup(filename, "find", lhs, separator, compute, metrics, tracer)
+
+    def update_lines(self, filename, lhs="VERSION", separator="=", metrics=NULL_METRICS, tracer=NULL_TRACER):
+        """
+        As a dry run `Version.update`, parsing each distinct content only once.
+
+        :return: the line numbers that would be replaced
+        """
+        return self._lookup(filename, "update_lines", lhs, separator,
+                            lambda text: Version.version_lines(text.splitlines(), lhs, separator), metrics, tracer)
+
+    def groups(self, filenames):
+        """
+        :return: a dict mapping each digest to the files with that content
+        """
+        groups = {}
+        for f in filenames:
+            groups.setdefault(self.signature(f), []).append(f)
+        return groups
@@ -0,0 +1,274 @@
+"""
+Extractors read and rewrite the version in manifest formats that are not
+`LABEL <sep> 'x.y.z'` lines, such as pyproject.toml, Cargo.toml,
+package.json and setup.cfg.
+
+An extractor is chosen by file name. The registry only holds
+"module:Class" strings, so an extractor module is imported the first
+time a matching file is seen and never otherwise. Third party packages
+can add extractors through the "semvermanager.extractors" entry point
+group, where each entry point name is a file name pattern. Entry points
+are looked up lazily, and only for a file name that matches no registered
+pattern and is not one of the `PLAIN` names. Those are the file names
+`semvermanager.manifest` looks for by default (VERSION, setup.py,
+conf.py and so on), so a run over them never scans entry points. A
+project config can assign an extractor to a particular file with
+`assign`.
+"""
+
+import fnmatch
+import importlib
+import os
+import re
+
+import copy
+
+from .. import Version, VersionError, VersionConflictError
+from ..locking import FileLock, temp_file, discard_temp
+from ..manifest import DEFAULT_PATTERNS
+from ..metrics import NULL_METRICS
+from ..tracing import NULL_TRACER
+
+REGISTRY = {
+    "pyproject.toml": "semvermanager.extractors.toml:PyprojectExtractor",
+    "Cargo.toml": "semvermanager.extractors.toml:CargoExtractor",
+    "package.json": "semvermanager.extractors.npm:PackageJsonExtractor",
+    "setup.cfg": "semvermanager.extractors.ini:SetupCfgExtractor",
+}
+
+ENTRY_POINT_GROUP = "semvermanager.extractors"
+
+PLAIN = frozenset(DEFAULT_PATTERNS)  # file names that are always plain version files
+
+_instances = {}  # pattern -> extractor instance
+_paths = {}  # absolute file name -> extractor instance or None, see assign
+_plugins_loaded = False
+
+
+class ExtractorError(VersionError):
+    pass
+
+
+class Extractor:
+    """
+    Base class for extractors. Subclasses implement `locate`, which
+    returns the position of the version value in the file contents.
+    """
+
+    name = "extractor"
+
+    def locate(self, text):
+        """
+        :param text: the file contents
+        :return: a tuple (start, end) of the version value in `text`, or None
+        """
+        raise NotImplementedError
+
+    def _read(self, filename, metrics=NULL_METRICS):
+        with metrics.timer("open"):
+            with open(filename, "r", errors="surrogateescape") as file:  # see temp_file
+                return file.read()
+
+    def parse(self, value):
+        return Version.parse_version(value, lhs="version")
+
+    def _parse(self, text, span, metrics, tracer):
+        metrics.incr("lines_matched")
+        try:
+            with metrics.timer("parse"), tracer.span("Extractor.parse"):
+                return self.parse(text[span[0]:span[1]])
+        except VersionError:
+            metrics.incr("parse_failures")
+            raise
+
+    def find(self, filename, metrics=NULL_METRICS, tracer=NULL_TRACER):
+        """
+        :return: the `Version` in `filename` or None if it has none
+        """
+        with tracer.span("Extractor.find", path=filename, extractor=self.name):
+            text = self._read(filename, metrics)
+            span = self.locate(text)
+            if span is None:
+                return None
+            return self._parse(text, span, metrics, tracer)
+
+    def update(self, filename, version, dry_run=False, journal=None, metrics=NULL_METRICS, tracer=NULL_TRACER,
+               commit=None):
+        """
+        Replace the version value in `filename` with `version`, leaving the
+        rest of the file exactly as it was. The arguments are as for
+        `Version.update`.
+
+        :param dry_run: report the line that would change without changing it
+        :return: A tuple (filename, list(line_numbers))
+        """
+        if dry_run:
+            text = self._read(filename, metrics)
+            span = self.locate(text)
+            return filename, [text.count("\n", 0, span[0]) + 1] if span else []
+        with tracer.span("Extractor.update", path=filename, extractor=self.name), FileLock(filename):
+            text = self._read(filename, metrics)
+            span = self.locate(text)
+            if span is None:
+                raise ExtractorError(f"No version in {filename}")
+            record = None
+            if journal:
+                try:
+                    old = self._parse(text, span, metrics, tracer)
+                except VersionError:  # as Version.update, an unparsable old value is replaced unrecorded
+                    old = None
+                if old is not None:
+                    record = journal.prepare(filename, self.name, old, version)
+            self._write(filename, text[:span[0]] + version.bare_version + text[span[1]:], metrics, commit)
+            if record:
+                journal.append(record)
+        return filename, [text.count("\n", 0, span[0]) + 1]
+
+    def bump(self, filename, field, expected=None, journal=None, metrics=NULL_METRICS, tracer=NULL_TRACER,
+             commit=None):
+        """
+        Bump `field` of the version in `filename` with a single read. The
+        arguments are as for `Version.bump_file`.
+
+        :return: A tuple (bumped version, list(line_numbers))
+        """
+        with tracer.span("Extractor.bump", path=filename, field=field, extractor=self.name), FileLock(filename):
+            text = self._read(filename, metrics)
+            span = self.locate(text)
+            if span is None:
+                raise ExtractorError(f"No version in {filename}")
+            version = self._parse(text, span, metrics, tracer)
+            if expected is not None and version != expected:
+                raise VersionConflictError(f"Expected {expected.bare_version} in '{filename}' "
+                                           f"but found {version.bare_version}")
+            old = copy.copy(version)
+            version.bump(field)
+            record = journal.prepare(filename, self.name, old, version) if journal else None
+            self._write(filename, text[:span[0]] + version.bare_version + text[span[1]:], metrics, commit)
+            if record:
+                journal.append(record)
+        return version, [text.count("\n", 0, span[0]) + 1]
+
+    @staticmethod
+    def _write(filename, text, metrics=NULL_METRICS, commit=None):
+        output_file, temp_name = temp_file(filename)
+        try:
+            with metrics.timer("write"), output_file:
+                output_file.write(text)
+            Version._swap(filename, temp_name, metrics, commit)
+        finally:
+            discard_temp(temp_name)
+
+
+class SectionExtractor(Extractor):
+    """
+    Find `key = value` in one of `SECTIONS` of an INI or TOML style file.
+    The value may be quoted.
+    """
+
+    SECTIONS = ()
+    KEY = "version"
+
+    def __init__(self):
+        self._section = re.compile(r"^\s*\[+\s*([^\]]+?)\s*\]+\s*$")
+        self._value = re.compile(r"^\s*" + re.escape(self.KEY) + r"\s*[=:]\s*([\"']?)([^\"'\s#;]+)\1")
+
+    def locate(self, text):
+        section = None
+        offset = 0
+        for line in text.splitlines(keepends=True):
+            match = self._section.match(line)
+            if match:
+                section = match.group(1)
+            elif section in self.SECTIONS:
+                match = self._value.match(line)
+                if match:
+                    return offset + match.start(2), offset + match.end(2)
+            offset += len(line)
+        return None
+
+
+def register(pattern, target):
+    """
+    Register an extractor for file names matching `pattern`.
+
+    :param pattern: an `fnmatch` pattern matched against the file name
+    :param target: an `Extractor` subclass or a "module:Class" string
+    """
+    REGISTRY[pattern] = target
+    _instances.pop(pattern, None)
+
+
+def assign(path, extractor):
+    """
+    Use `extractor` for the file `path` whatever its name, or treat the file
+    as a plain version file if `extractor` is None.
+    """
+    _paths[os.path.abspath(path)] = extractor
+
+
+def unassign(path, extractor=None):
+    """
+    Undo `assign` for `path`. If `extractor` is given the assignment is only
+    removed if it is still to `extractor`, not since replaced.
+    """
+    path = os.path.abspath(path)
+    if path in _paths and (extractor is None or _paths[path] is extractor):
+        del _paths[path]
+
+
+def reset():
+    """
+    Drop every assignment made with `assign`.
+    """
+    _paths.clear()
+
+
+def _load_plugins():
+    global _plugins_loaded
+    _plugins_loaded = True
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        return
+    eps = entry_points()
+    group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+    for ep in group:
+        REGISTRY.setdefault(ep.name, ep.value)
+
+
+def _instance(pattern):
+    try:
+        return _instances[pattern]
+    except KeyError:
+        target = REGISTRY[pattern]
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            target = getattr(importlib.import_module(module_name), class_name)
+        _instances[pattern] = target()
+        return _instances[pattern]
+
+
+def _match(name, patterns):
+    for pattern in patterns:
+        if fnmatch.fnmatchcase(name, pattern):
+            return _instance(pattern)
+    return None
+
+
+def extractor_for(filename):
+    """
+    :return: the extractor for `filename`, or None if it is a plain version file
+    """
+    if _paths:
+        path = os.path.abspath(filename)
+        if path in _paths:
+            return _paths[path]
+    name = os.path.basename(filename)
+    extractor = _match(name, list(REGISTRY))
+    if extractor is None and not _plugins_loaded and name not in PLAIN:
+        # entry points are only scanned when no registered pattern matches
+        known = set(REGISTRY)
+        _load_plugins()
+        extractor = _match(name, [p for p in REGISTRY if p not in known])
+    return extractor
@@ -0,0 +1,12 @@
+"""
+Extractor for setuptools' setup.cfg.
+"""
+
+from . import SectionExtractor
+
+
+class SetupCfgExtractor(SectionExtractor):
+    """The [metadata] version of setup.cfg"""
+
+    name = "setup.cfg"
+    SECTIONS = ("metadata",)
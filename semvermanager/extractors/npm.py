@@ -0,0 +1,33 @@
+"""
+Extractor for npm's package.json.
+"""
+
+import re
+
+from . import Extractor
+
+
+class PackageJsonExtractor(Extractor):
+    """
+    The top level "version" of package.json. The file is scanned rather
+    than loaded with `json` so that a rewrite changes only the version
+    value and keeps the file's formatting.
+    """
+
+    name = "package.json"
+    _TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+    _VALUE = re.compile(r'\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+    def locate(self, text):
+        depth = 0
+        for match in self._TOKEN.finditer(text):
+            token = match.group()
+            if token in "{[":
+                depth += 1
+            elif token in "}]":
+                depth -= 1
+            elif depth == 1 and token == '"version"':
+                value = self._VALUE.match(text, match.end())
+                if value:
+                    return value.start(1), value.end(1)
+        return None
@@ -0,0 +1,19 @@
+"""
+Extractors for pyproject.toml and Cargo.toml.
+"""
+
+from . import SectionExtractor
+
+
+class PyprojectExtractor(SectionExtractor):
+    """The PEP 621 [project] version, or Poetry's [tool.poetry] version"""
+
+    name = "pyproject.toml"
+    SECTIONS = ("project", "tool.poetry")
+
+
+class CargoExtractor(SectionExtractor):
+    """The [package] version of a Rust crate"""
+
+    name = "Cargo.toml"
+    SECTIONS = ("package",)
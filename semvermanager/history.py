@@ -0,0 +1,189 @@
+"""
+Extract the version held in a file at every commit or tag of a git
+repository.
+
+Running `git show` once per commit costs a process per commit. Here the
+whole history is streamed through two long lived git processes. The
+first is `git cat-file --batch-check`, which maps each `<commit>:<path>`
+to a blob id. The second is `git cat-file --batch`, which fetches each
+distinct blob once. Most commits do not touch a given version file, so
+100k commits usually collapse to a few hundred blobs, each parsed with
+`Version.parse_version`.
+
+Only a local `git` binary is needed.
+"""
+
+import os
+import subprocess
+import threading
+
+from . import Version, VersionError
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def git(*args, cwd=None):
+    """
+    Run a git command and return its stdout as text.
+    """
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise GitError("No git binary found on the PATH")
+    if result.returncode != 0:
+        raise GitError(f"git {' '.join(args)}: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout.decode()
+
+
+class CatFile:
+    """
+    A long lived `git cat-file --batch` (or `--batch-check`) process.
+
+    :param cwd: a directory inside the repository
+    :param check: use `--batch-check`, returning sizes rather than contents
+    """
+
+    def __init__(self, cwd=None, check=False):
+        self._cwd = cwd
+        self._check = check
+
+    def stream(self, names):
+        """
+        Look up each object name in `names` and yield a tuple
+        (name, oid, type, contents) in the same order, where contents is the
+        object size for `--batch-check`. Missing objects yield
+        (name, None, None, None).
+
+        Names are written from a separate thread so git never waits on us
+        to read a response before it can accept the next request.
+        """
+        names = list(names)
+        mode = "--batch-check" if self._check else "--batch"
+        try:
+            proc = subprocess.Popen(["git", "cat-file", mode], cwd=self._cwd,
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except FileNotFoundError:
+            raise GitError("No git binary found on the PATH")
+
+        def feed():
+            try:
+                for name in names:
+                    proc.stdin.write(name.encode() + b"\n")
+            except BrokenPipeError:
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        try:
+            out = proc.stdout
+            for name in names:
+                header = out.readline()
+                if not header:
+                    raise GitError(f"git cat-file exited early at '{name}'")
+                fields = header.split()
+                if len(fields) != 3:  # "<name> missing" or "<name> ambiguous"
+                    yield name, None, None, None
+                    continue
+                oid, kind, size = fields[0].decode(), fields[1].decode(), int(fields[2])
+                if self._check:
+                    yield name, oid, kind, size
+                else:
+                    data = out.read(size)
+                    out.read(1)  # trailing newline
+                    yield name, oid, kind, data
+        finally:
+            writer.join()
+            proc.stdout.close()
+            proc.wait()
+
+
+def changed_files(rev=None, staged=False, cwd=None):
+    """
+    Ask git which files have changed, without reading any of them.
+
+    :param rev: compare against this revision [default: HEAD]
+    :param staged: compare the index rather than the working tree
+    :param cwd: a directory inside the repository
+    :return: the set of changed paths, "/" separated and relative to `cwd`.
+        Deleted files are not included.
+    """
+    args = ["diff", "--name-only", "-z", "--relative", "--diff-filter=d"]
+    if staged:
+        args.append("--cached")
+    if rev:
+        args.append(rev)
+    return {p for p in git(*args, cwd=cwd).split("\0") if p}
+
+
+def find_in_blob(data, lhs="VERSION", separator="="):
+    """
+    Parse the first `lhs` line in the blob contents `data` as a `Version`.
+
+    :return: a `Version` or None if there is no parseable version line
+    """
+    text = data.decode("utf-8", errors="replace")
+    for line in text.splitlines():
+        if line.strip().startswith(lhs):
+            try:
+                return Version.parse_version(line, lhs=lhs, separator=separator)
+            except VersionError:
+                return None
+    return None
+
+
+def refs(rev="HEAD", tags=False, cwd=None):
+    """
+    :return: commit ids reachable from `rev`, oldest first, or tag names if `tags` is set
+    """
+    if tags:
+        # the last --sort key is the primary one, ties fall back to the tag name
+        output = git("for-each-ref", "--sort=refname", "--sort=creatordate", "--format=%(refname:short)", "refs/tags", cwd=cwd)
+    else:
+        output = git("rev-list", "--reverse", rev, cwd=cwd)
+    return output.split()
+
+
+def version_history(filename, lhs="VERSION", separator="=", rev="HEAD", tags=False):
+    """
+    Yield (ref, Version) for every commit reachable from `rev`, oldest
+    first, or for every tag if `tags` is set. The version is None where
+    the file is missing or has no parseable version line.
+
+    :param filename: the version file, relative to the current directory
+    """
+    cwd = os.path.dirname(filename) or None
+    path = "./" + os.path.basename(filename)
+    ref_list = refs(rev, tags, cwd)
+
+    blobs = {}  # ref -> blob id
+    for name, oid, kind, _ in CatFile(cwd, check=True).stream(f"{r}:{path}" for r in ref_list):
+        if kind == "blob":
+            blobs[name.rsplit(":", 1)[0]] = oid
+
+    versions = {}  # blob id -> Version, each distinct blob is parsed once
+    unique = list(dict.fromkeys(blobs.values()))
+    for oid, _, _, data in CatFile(cwd).stream(unique):
+        versions[oid] = find_in_blob(data, lhs, separator) if data is not None else None
+
+    for r in ref_list:
+        oid = blobs.get(r)
+        yield r, versions.get(oid) if oid else None
+
+
+def version_changes(filename, lhs="VERSION", separator="=", rev="HEAD"):
+    """
+    Yield (commit, Version) only for the commits where the version in
+    `filename` differs from the commit before.
+    """
+    previous = None
+    for commit, version in version_history(filename, lhs, separator, rev):
+        if version is not None and (previous is None or version != previous):
+            yield commit, version
+        previous = version
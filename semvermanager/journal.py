@@ -0,0 +1,246 @@
+"""
+An append-only journal of every bump and update.
+
+Each change is one fixed width 64 byte record::
+
+    float64   timestamp
+    uint64    hash of the absolute file name
+    uint64    hash of the version label (lhs)
+    uint32 x5 old MAJOR, MINOR, PATCH, tag index and TAG_VERSION
+    uint32 x5 new MAJOR, MINOR, PATCH, tag index and TAG_VERSION
+
+The tag index is the key of the tag in `Version.TAGS`, so the five
+fields compare in version precedence order. A field above 2**32-1 is
+saturated at that value rather than refused, so recording a change can
+never fail the change itself.
+
+Records are appended with a single `write` on a file opened `O_APPEND`,
+so writers in separate processes never interleave and recording costs
+one system call. The names behind the hashes are kept in a small
+`<journal>.names` side table, which only grows when a new file or label
+is seen.
+
+Writers build the record with `prepare` before they change the file and
+`append` it afterwards, so the names side table is updated before the
+change it describes.
+
+Queries scan the records with `struct.iter_unpack` and compare the raw
+field tuples, so no `Version` objects are built until a record matches.
+`bumps` uses a per-file index persisted beside the journal in
+`<journal>.index`, which holds the file hash of each record in record
+order. Each process loads the index and only indexes the records
+appended since it was last extended, rather than rescanning the journal.
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from . import Version
+
+try:
+    import fcntl
+except ImportError:  # Windows, only the in-process lock applies
+    fcntl = None
+
+JournalEntry = namedtuple("JournalEntry", ["timestamp", "filename", "lhs", "old", "new"])
+
+
+FIELD_MAX = 0xFFFFFFFF
+
+
+def _fields(version):
+    """
+    :return: the five record fields of `version`, saturated at `FIELD_MAX`
+    """
+    tag_index = list(Version.TAGS.values()).index(version.tag)
+    return tuple(min(f, FIELD_MAX) for f in (version.major, version.minor, version.patch,
+                                             tag_index, version.tag_version))
+
+
+def name_hash(name):
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+def _version(raw, lhs):
+    major, minor, patch, tag_index, tag_version = raw
+    return Version(major, minor, patch, Version.TAGS[tag_index], tag_version, lhs=lhs)
+
+
+class BumpJournal:
+    """
+    :param filename: the journal file, created if it does not exist
+    """
+
+    RECORD = struct.Struct("<dQQ5I5I")
+    INDEX = struct.Struct("<Q")  # the file hash of one record
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._names_file = filename + ".names"
+        self._index_file = filename + ".index"
+        self._fd = None
+        self._names = None  # hash -> name
+        self._index = {}  # file hash -> list of record numbers
+        self._indexed = 0  # number of records in the index
+        self._lock = threading.Lock()
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def _load_names(self):
+        if self._names is None:
+            self._names = {}
+            try:
+                with open(self._names_file, "r") as file:
+                    for line in file:
+                        h, _, name = line.rstrip("\n").partition("\t")
+                        self._names[int(h, 16)] = name
+            except FileNotFoundError:
+                pass
+        return self._names
+
+    def _register(self, name):
+        h = name_hash(name)
+        names = self._load_names()
+        if h not in names:
+            fd = os.open(self._names_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, f"{h:016x}\t{name}\n".encode())
+            finally:
+                os.close(fd)
+            names[h] = name
+        return h
+
+    def prepare(self, filename, lhs, old, new, timestamp=None):
+        """
+        Build the record of `filename` changing from `old` to `new`, without
+        appending it. Call this before changing the file.
+
+        :param old: the `Version` before the change
+        :param new: the `Version` after the change
+        :return: the record, to pass to `append`
+        """
+        return self.RECORD.pack(time.time() if timestamp is None else timestamp,
+                                self._register(os.path.abspath(filename)),
+                                self._register(lhs),
+                                *_fields(old),
+                                *_fields(new))
+
+    def append(self, record):
+        """
+        Append a record returned by `prepare`.
+        """
+        if self._fd is None:
+            self._fd = os.open(self._filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, record)
+
+    def record(self, filename, lhs, old, new, timestamp=None):
+        """
+        Append a record of `filename` changing from `old` to `new`.
+        """
+        self.append(self.prepare(filename, lhs, old, new, timestamp))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def _records(self, start=0):
+        """
+        Yield (record number, raw record tuple) from record `start` on.
+        """
+        size = self.RECORD.size
+        try:
+            with open(self._filename, "rb") as file:
+                file.seek(start * size)
+                data = file.read()
+        except FileNotFoundError:
+            return
+        data = data[:len(data) - len(data) % size]  # ignore a partially written tail
+        yield from enumerate(self.RECORD.iter_unpack(data), start)
+
+    def _entry(self, raw):
+        names = self._load_names()
+        timestamp, fh, lh = raw[:3]
+        lhs = names.get(lh, "VERSION")
+        return JournalEntry(timestamp, names.get(fh), lhs, _version(raw[3:8], lhs), _version(raw[8:13], lhs))
+
+    def entries(self):
+        """
+        Yield every `JournalEntry` in the order they were recorded.
+        """
+        for _, raw in self._records():
+            yield self._entry(raw)
+
+    def _update_index(self):
+        """
+        Load the index entries other processes have persisted since we last
+        looked, then index and persist any records newer than the index.
+        """
+        size = self.INDEX.size
+        with self._lock:
+            fd = os.open(self._index_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                os.lseek(fd, self._indexed * size, os.SEEK_SET)
+                data = os.read(fd, max(0, os.fstat(fd).st_size - self._indexed * size))
+                data = data[:len(data) - len(data) % size]  # ignore a partially written tail
+                for n, (fh,) in enumerate(self.INDEX.iter_unpack(data), self._indexed):
+                    self._index.setdefault(fh, []).append(n)
+                self._indexed += len(data) // size
+
+                added = []
+                for n, raw in self._records(self._indexed):
+                    self._index.setdefault(raw[1], []).append(n)
+                    added.append(raw[1])
+                if added:
+                    os.lseek(fd, self._indexed * size, os.SEEK_SET)
+                    os.write(fd, b"".join(self.INDEX.pack(fh) for fh in added))
+                    self._indexed += len(added)
+            finally:
+                os.close(fd)  # releases the flock
+        # the names table may have grown since it was loaded
+        self._names = None
+
+    def bumps(self, filename):
+        """
+        :return: a list of every `JournalEntry` for `filename`, oldest first
+        """
+        self._update_index()
+        numbers = self._index.get(name_hash(os.path.abspath(filename)), [])
+        size = self.RECORD.size
+        result = []
+        with open(self._filename, "rb") as file:
+            for n in numbers:
+                file.seek(n * size)
+                result.append(self._entry(self.RECORD.unpack(file.read(size))))
+        return result
+
+    def crossed(self, version, filename=None):
+        """
+        Find when a file first reached `version` or passed it.
+
+        :param version: the `Version` threshold
+        :param filename: only consider this file, otherwise any file
+        :return: the first `JournalEntry` whose old version is below `version`
+            and whose new version is at or above it, or None
+        """
+        key = _fields(version)
+        fh = name_hash(os.path.abspath(filename)) if filename else None
+        for _, raw in self._records():
+            if raw[3:8] < key <= raw[8:13] and (fh is None or raw[1] == fh):
+                return self._entry(raw)
+        return None
@@ -0,0 +1,185 @@
+"""
+`LazyVersion` holds the raw text of a version line and its offset in the
+file, and parses it only when a field is first needed.
+
+Scans that mostly count, dedupe or compare raw version strings never
+pay for validating and building a `Version`: equality and hashing use
+the `normal` text, so only ordering and field access parse. The parsed
+`Version` (or the error from parsing it) and its packed ordering key are
+each computed at most once. `promote` returns an independent `Version`
+for callers that want to bump or otherwise mutate it.
+"""
+
+import re
+from functools import total_ordering
+
+from . import Version, VersionError
+
+_BARE_TAG = re.compile(r"(-[A-Za-z]+)\Z")  # a tag with no tag_version, which means 0
+
+
+@total_ordering
+class LazyVersion:
+    """
+    :param raw: the matched text, e.g. "VERSION = '1.2.3'"
+    :param offset: the byte offset of `raw` in its file
+    :param lhs: the version label
+    :param separator: the label separator
+    """
+
+    __slots__ = ("_raw", "_offset", "_lhs", "_separator", "_value", "_normal", "_version", "_error", "_key")
+
+    def __init__(self, raw, offset=0, lhs="VERSION", separator="="):
+        self._raw = raw
+        self._offset = offset
+        self._lhs = lhs
+        self._separator = separator
+        self._value = None
+        self._normal = None
+        self._version = None
+        self._error = None
+        self._key = None
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @property
+    def lhs(self):
+        return self._lhs
+
+    @property
+    def value(self):
+        """
+        The unvalidated version text with the label and quotes removed, e.g.
+        "1.2.3-alpha1". Cheap, and suitable for counting and deduping.
+        """
+        if self._value is None:
+            label, sep, rhs = self._raw.partition(self._separator)
+            self._value = (rhs if sep else label).strip().strip("\"'")
+        return self._value
+
+    @property
+    def normal(self):
+        """
+        `value` with a bare tag given its implied tag version, e.g.
+        "1.2.3-alpha" becomes "1.2.3-alpha0". For a valid version this is
+        its `bare_version`. Used for equality and hashing.
+        """
+        if self._normal is None:
+            self._normal = _BARE_TAG.sub(r"\g<1>0", self.value)
+        return self._normal
+
+    @property
+    def version(self):
+        """
+        The parsed `Version`, built on first access. A failure is cached
+        too, and raised again on every later access.
+
+        :raises VersionError: if the raw text is not a valid version
+        """
+        if self._version is None:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._version = Version.parse_version(self._raw, self._lhs, self._separator)
+            except VersionError as e:
+                self._error = e
+                raise
+        return self._version
+
+    @property
+    def valid(self):
+        try:
+            self.version
+            return True
+        except VersionError:
+            return False
+
+    @property
+    def key(self):
+        """The packed ordering key, see `Version.pack`"""
+        if self._key is None:
+            self._key = self.version.pack()
+        return self._key
+
+    @property
+    def major(self):
+        return self.version.major
+
+    @property
+    def minor(self):
+        return self.version.minor
+
+    @property
+    def patch(self):
+        return self.version.patch
+
+    @property
+    def tag(self):
+        return self.version.tag
+
+    @property
+    def tag_version(self):
+        return self.version.tag_version
+
+    @property
+    def bare_version(self):
+        return self.version.bare_version
+
+    def promote(self):
+        """
+        :return: a new `Version`, independent of this object, that may be mutated
+        """
+        v = self.version
+        return Version(v.major, v.minor, v.patch, v.tag, v.tag_version, lhs=self._lhs, separator=self._separator)
+
+    def _other_key(self, other):
+        if isinstance(other, LazyVersion):
+            return other.key
+        if isinstance(other, Version):
+            return other.pack()
+        return NotImplemented
+
+    def __eq__(self, other):
+        if isinstance(other, LazyVersion):
+            return self.normal == other.normal
+        if isinstance(other, Version):
+            return self.normal == other.bare_version
+        return NotImplemented
+
+    def __lt__(self, other):
+        key = self._other_key(other)
+        if key is NotImplemented:
+            return NotImplemented
+        return self.key < key
+
+    def __hash__(self):
+        return hash(self.normal)
+
+    def __str__(self):
+        return self._raw
+
+    def __repr__(self):
+        return f"{self.__class__.__qualname__}({self._raw!r}, {self._offset}, '{self._lhs}', '{self._separator}')"
+
+    @staticmethod
+    def scan(filename, lhs="VERSION", separator="="):
+        """
+        Yield a `LazyVersion` for every line of `filename` starting with
+        `lhs`. Lines are matched as bytes and only matching lines are
+        decoded, and nothing is parsed.
+        """
+        label = lhs.encode()
+        offset = 0
+        with open(filename, "rb") as file:
+            for line in file:
+                stripped = line.lstrip()
+                if stripped.startswith(label):
+                    start = offset + len(line) - len(stripped)
+                    yield LazyVersion(stripped.rstrip().decode("utf-8", errors="replace"), start, lhs, separator)
+                offset += len(line)
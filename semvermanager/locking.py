@@ -0,0 +1,157 @@
+"""
+Advisory file locking and unique temporary files for safe concurrent
+rewrites of version files.
+
+`FileLock` takes an exclusive `fcntl.flock` lock on the version file
+itself. Because every update replaces the file with a rename, a waiter
+may end up holding the lock on a file that has since been replaced; it
+notices this by comparing inodes and locks the new file instead. No lock
+files are left lying around. On platforms without `fcntl` the lock is a
+no-op.
+
+`temp_file` creates a uniquely named temporary file beside the target,
+so concurrent writers never share a ".temp" name. Writers pass the name
+to `discard_temp` once they are done with it. Any temporary file still
+outstanding when the process exits, e.g. one left by a write abandoned
+after a timeout, is removed then.
+"""
+
+import atexit
+import os
+import stat
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LockTimeout(OSError):
+    pass
+
+
+_temp_names = set()  # temporary files created and not yet discarded
+_temp_lock = threading.Lock()
+
+
+class FileLock:
+    """
+    An exclusive advisory lock on `filename`. Use it as a context manager::
+
+        with FileLock("setup.py"):
+            ... read, modify and rewrite setup.py ...
+
+    :param filename: the file to protect
+    :param timeout: seconds to wait for the lock, None waits forever
+    :param poll: seconds between attempts when a timeout is set
+    """
+
+    def __init__(self, filename, timeout=None, poll=0.01):
+        self._filename = filename
+        self._timeout = timeout
+        self._poll = poll
+        self._fd = None
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def locked(self):
+        return self._fd is not None
+
+    def _lock(self, fd, end):
+        if end is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= end:
+                    raise LockTimeout(f"Timed out after {self._timeout}s waiting for '{self._filename}'")
+                time.sleep(self._poll)
+
+    def acquire(self):
+        """
+        :raises FileNotFoundError: if the file does not exist
+        :raises LockTimeout: if the lock is not acquired within the timeout
+        """
+        end = None if self._timeout is None else time.monotonic() + self._timeout
+        while True:
+            fd = os.open(self._filename, os.O_RDONLY)
+            if not fcntl:
+                break
+            try:
+                self._lock(fd, end)
+                # did someone replace the file while we waited?
+                if os.fstat(fd).st_ino == os.stat(self._filename).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            except BaseException:
+                os.close(fd)
+                raise
+            os.close(fd)
+        self._fd = fd
+        return self
+
+    def release(self):
+        if self._fd is not None:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *args):
+        self.release()
+        return False
+
+
+def temp_file(filename):
+    """
+    Create a uniquely named temporary file in the same directory as
+    `filename`, with the same permissions if `filename` exists.
+
+    The file is opened with the "surrogateescape" error handler, so text
+    read with it writes back undecodable bytes as they were.
+
+    :return: a tuple (open text file, temporary file name)
+    """
+    directory, base = os.path.split(filename)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{base}.", suffix=".temp", dir=directory or ".")
+    with _temp_lock:
+        _temp_names.add(temp_name)
+    try:
+        os.chmod(temp_name, stat.S_IMODE(os.stat(filename).st_mode))
+    except FileNotFoundError:
+        pass
+    return os.fdopen(fd, "w", errors="surrogateescape"), temp_name
+
+
+def discard_temp(temp_name):
+    """
+    Remove `temp_name` if it still exists, i.e. it was not renamed into
+    place, and stop tracking it.
+    """
+    try:
+        os.unlink(temp_name)
+    except FileNotFoundError:
+        pass
+    with _temp_lock:
+        _temp_names.discard(temp_name)
+
+
+@atexit.register
+def _remove_temps():
+    with _temp_lock:
+        names = list(_temp_names)
+    for temp_name in names:
+        discard_temp(temp_name)
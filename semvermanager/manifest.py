@@ -0,0 +1,239 @@
+"""
+Snapshot every version line in a tree into a sorted manifest, and diff
+two manifests without touching the files they were made from.
+
+A manifest is a text file with a header line and one tab separated
+entry per version line::
+
+    # semvermanager manifest 1
+    docs/conf.py	29	release	0001000000008000
+    setup.py	21	VERSION	0001000000008000
+
+Each entry holds the path relative to the snapshot root (always with "/"
+separators), the line number, the label and the packed version (see
+`Version.pack`) in hex. A version with a field too large to pack is
+stored as its bare version instead, e.g. "1.70000.0". Entries are sorted
+by path component and then by line number. Because of this ordering, two
+manifests diff in one linear merge.
+
+The tree is walked in that same order, so a snapshot is written as it is
+scanned and is never held in memory.
+"""
+
+import fnmatch
+import os
+from collections import namedtuple
+
+from . import Version, VersionError
+
+HEADER = "# semvermanager manifest 1\n"
+
+DEFAULT_PATTERNS = ("VERSION", "setup.py", "conf.py", "__init__.py", "version.py", "_version.py", "__version__.py")
+
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", ".tox", ".nox", ".venv", "venv", "node_modules"}
+
+ManifestEntry = namedtuple("ManifestEntry", ["path", "line", "lhs", "key"])  # key: packed int, or bare version
+ManifestChange = namedtuple("ManifestChange", ["kind", "path", "lhs", "old", "new"])
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def encode(version):
+    """
+    :return: `version` packed, or its bare version if it is too large to pack
+    """
+    try:
+        return version.pack()
+    except VersionError:
+        return version.bare_version
+
+
+def decode(key, lhs="VERSION", separator="="):
+    """
+    The inverse of `encode`.
+
+    :return: a new `Version`
+    """
+    if isinstance(key, int):
+        return Version.unpack(key, lhs, separator)
+    return Version.parse_version(f"{lhs}{separator}{key}", lhs, separator)
+
+
+def sort_key(path):
+    return tuple(path.split("/"))
+
+
+def matches(path, patterns=DEFAULT_PATTERNS):
+    """
+    :return: True if the file name of `path` matches one of `patterns`
+    """
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatchcase(name, p) for p in patterns)
+
+
+def discover(root, patterns=DEFAULT_PATTERNS):
+    """
+    Yield the files under `root` whose names match one of `patterns`,
+    as "/" separated paths relative to `root`, in manifest order.
+
+    :param root: a directory, or a single file
+    :param patterns: `fnmatch` patterns matched against the file name
+    """
+    if os.path.isfile(root):
+        yield os.path.basename(root)
+        return
+
+    def walk(directory, prefix):
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except (PermissionError, FileNotFoundError):
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS:
+                    yield from walk(entry.path, prefix + entry.name + "/")
+            elif entry.is_file() and matches(entry.name, patterns):
+                yield prefix + entry.name
+
+    yield from walk(root, "")
+
+
+def scan_file(filename, labels=("VERSION",), separator="="):
+    """
+    Yield (line number, lhs, Version) for every line of `filename` that
+    starts with one of `labels` and parses as a version.
+    """
+    with open(filename, "r", errors="replace") as file:
+        for i, line in enumerate(file, 1):
+            candidate = line.strip()
+            for lhs in labels:
+                if candidate.startswith(lhs):
+                    try:
+                        yield i, lhs, Version.parse_version(candidate, lhs, separator)
+                        break
+                    except VersionError:
+                        pass
+
+
+def entries(root, labels=("VERSION",), separator="=", patterns=DEFAULT_PATTERNS, paths=None, file_filter=None):
+    """
+    Yield a `ManifestEntry` for every version line under `root`, in manifest order.
+
+    :param paths: the relative paths to scan, in manifest order, e.g. a
+        subset of `discover(root)` [default: all of `discover(root)`]
+    :param file_filter: a `semvermanager.sniff.FileFilter` for files not worth reading
+    """
+    base = root if os.path.isdir(root) else os.path.dirname(root)
+    for path in discover(root, patterns) if paths is None else paths:
+        if file_filter is not None and file_filter.skip(os.path.join(base, path)):
+            continue
+        for line, lhs, version in scan_file(os.path.join(base, path), labels, separator):
+            yield ManifestEntry(path, line, lhs, encode(version))
+
+
+def write(filename, entry_iter):
+    """
+    Write the entries to a manifest file.
+
+    :param filename: a file name, or an open text file such as sys.stdout
+    :return: the number of entries written
+    """
+    if not isinstance(filename, str):
+        return _write(filename, entry_iter)
+    with open(filename, "w") as file:
+        return _write(file, entry_iter)
+
+
+def _write(file, entry_iter):
+    count = 0
+    file.write(HEADER)
+    for e in entry_iter:
+        key = f"{e.key:016x}" if isinstance(e.key, int) else e.key
+        file.write(f"{e.path}\t{e.line}\t{e.lhs}\t{key}\n")
+        count += 1
+    return count
+
+
+def snapshot(root, filename, labels=("VERSION",), separator="=", patterns=DEFAULT_PATTERNS, paths=None,
+             file_filter=None):
+    """
+    Scan the tree at `root` and write its manifest to `filename`.
+
+    :param paths: see `entries`
+    :param file_filter: see `entries`
+    :return: the number of version lines recorded
+    """
+    return write(filename, entries(root, labels, separator, patterns, paths, file_filter))
+
+
+def read(filename):
+    """
+    Yield the `ManifestEntry` records of a manifest file.
+    """
+    with open(filename, "r") as file:
+        if file.readline() != HEADER:
+            raise ManifestError(f"'{filename}' is not a semvermanager manifest")
+        for line in file:
+            path, number, lhs, key = line.rstrip("\n").split("\t")
+            yield ManifestEntry(path, int(number), lhs, key if "." in key else int(key, 16))
+
+
+def index(filename, lhs="VERSION", separator="="):
+    """
+    Load a manifest as a lookup table, e.g. to reuse the versions of files
+    that are known not to have changed since it was written.
+
+    :return: a dict mapping each path to the `Version` on its first `lhs` line
+    """
+    table = {}
+    for e in read(filename):
+        if e.lhs == lhs and e.path not in table:
+            table[e.path] = decode(e.key, lhs, separator)
+    return table
+
+
+def _keyed(entry_iter):
+    """
+    Key entries by (path components, ordinal within the file), so that a
+    version line which merely moves within a file is not a change.
+    """
+    path = None
+    ordinal = 0
+    for e in entry_iter:
+        if e.path != path:
+            path, ordinal = e.path, 0
+        yield (sort_key(e.path), ordinal), e
+        ordinal += 1
+
+
+def diff(old_manifest, new_manifest):
+    """
+    Compare two manifests in a single merge pass.
+
+    :param old_manifest: a manifest file name or an iterable of entries
+    :param new_manifest: a manifest file name or an iterable of entries
+    :return: a generator of `ManifestChange` tuples whose kind is "added",
+        "removed" or "changed", with `Version` objects for old and new
+    """
+    old_iter = _keyed(read(old_manifest) if isinstance(old_manifest, str) else old_manifest)
+    new_iter = _keyed(read(new_manifest) if isinstance(new_manifest, str) else new_manifest)
+    end = (None, None)
+    a = next(old_iter, end)
+    b = next(new_iter, end)
+    while a is not end or b is not end:
+        if b is end or (a is not end and a[0] < b[0]):
+            e = a[1]
+            yield ManifestChange("removed", e.path, e.lhs, decode(e.key, e.lhs), None)
+            a = next(old_iter, end)
+        elif a is end or b[0] < a[0]:
+            e = b[1]
+            yield ManifestChange("added", e.path, e.lhs, None, decode(e.key, e.lhs))
+            b = next(new_iter, end)
+        else:
+            x, y = a[1], b[1]
+            if x.key != y.key or x.lhs != y.lhs:
+                yield ManifestChange("changed", y.path, y.lhs, decode(x.key, x.lhs), decode(y.key, y.lhs))
+            a = next(old_iter, end)
+            b = next(new_iter, end)
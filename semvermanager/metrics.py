@@ -0,0 +1,249 @@
+"""
+Counters, timers and latency histograms for `OperationRunner` and the
+`Version` file operations.
+
+A `Metrics` object collects named counters and per-phase latency
+histograms. It is handed to an `OperationRunner` which shares it with
+every `Operation` it dispatches. When no metrics are requested the
+shared `NULL_METRICS` instance is used instead, all of whose methods are
+no-ops so the instrumented code paths cost next to nothing.
+
+Collected data is written out through a sink:
+
+* `MemorySink` keeps the last snapshot in memory (useful for tests)
+* `JSONSink` dumps the snapshot as a JSON document
+* `PrometheusSink` writes a Prometheus textfile-collector file
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+class MetricsError(ValueError):
+    pass
+
+
+class Histogram:
+    """
+    A fixed bucket latency histogram. Bucket bounds are in seconds and
+    are cumulative in the Prometheus sense when exported.
+    """
+
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self, buckets=None):
+        self._bounds = tuple(buckets) if buckets else Histogram.BUCKETS
+        self._counts = [0] * (len(self._bounds) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, value):
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def sum(self):
+        return self._sum
+
+    def cumulative(self):
+        """
+        :return: a list of (upper bound, cumulative count) pairs, the last
+        bound being float("inf")
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self._bounds + (float("inf"),), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self):
+        return {"count": self._count,
+                "sum": self._sum,
+                "buckets": [[str(b), c] for b, c in self.cumulative()]}
+
+
+class Metrics:
+    """
+    Collect counters and per-phase timings. Phase names are free form,
+    the ones used by semvermanager itself are "open", "parse", "write",
+    "rename", "dispatch" and "dequeue". Counter names used are "files",
+    "lines_scanned", "lines_matched" and "parse_failures". Safe to share
+    between threads.
+    """
+
+    enabled = True
+
+    def __init__(self, sink=None):
+        self._sink = sink
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            try:
+                self._histograms[name].observe(seconds)
+            except KeyError:
+                h = Histogram()
+                h.observe(seconds)
+                self._histograms[name] = h
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def counter(self, name):
+        return self._counters.get(name, 0)
+
+    def histogram(self, name):
+        return self._histograms.get(name)
+
+    def snapshot(self):
+        """
+        :return: a dict of the counters and histograms collected so far
+        """
+        with self._lock:
+            return {"counters": dict(self._counters),
+                    "timers": {k: v.to_dict() for k, v in self._histograms.items()}}
+
+    def flush(self):
+        """
+        Write the current snapshot to the sink, if there is one.
+        :return: the snapshot written
+        """
+        snapshot = self.snapshot()
+        if self._sink:
+            self._sink.write(self, snapshot)
+        return snapshot
+
+
+class _NullTimer:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class NullMetrics(Metrics):
+    """
+    Metrics that records nothing. Used whenever instrumentation is disabled.
+    """
+
+    enabled = False
+    _TIMER = _NullTimer()
+
+    def __init__(self):
+        super().__init__(None)
+
+    def incr(self, name, n=1):
+        pass
+
+    def observe(self, name, seconds):
+        pass
+
+    def timer(self, name):
+        return NullMetrics._TIMER
+
+    def flush(self):
+        return self.snapshot()
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MemorySink:
+
+    def __init__(self):
+        self.snapshot = None
+
+    def write(self, metrics, snapshot):
+        self.snapshot = snapshot
+
+
+class _FileSink:
+
+    def __init__(self, filename):
+        self._filename = filename
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def render(self, snapshot):
+        raise NotImplementedError
+
+    def write(self, metrics, snapshot):
+        # write and rename so that collectors never see a partial file
+        temp_name = f"{self._filename}.{os.getpid()}.temp"
+        with open(temp_name, "w") as file:
+            file.write(self.render(snapshot))
+        os.replace(temp_name, self._filename)
+
+
+class JSONSink(_FileSink):
+
+    def render(self, snapshot):
+        return json.dumps(snapshot, indent=2, sort_keys=True) + "\n"
+
+
+class PrometheusSink(_FileSink):
+    """
+    Write metrics in the Prometheus text exposition format, suitable for
+    the node_exporter textfile collector.
+    """
+
+    def __init__(self, filename, prefix="semvermanager"):
+        super().__init__(filename)
+        self._prefix = prefix
+
+    def render(self, snapshot):
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{self._prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, h in sorted(snapshot["timers"].items()):
+            metric = f"{self._prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in h["buckets"]:
+                le = "+Inf" if bound == "inf" else bound
+                lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+            lines.append(f"{metric}_sum {h['sum']}")
+            lines.append(f"{metric}_count {h['count']}")
+        return "\n".join(lines) + "\n"
+
+
+SINKS = {"json": JSONSink, "prometheus": PrometheusSink}
+
+
+def make_sink(filename, fmt=None):
+    """
+    Create a file sink for `filename`. If `fmt` is not given it is chosen
+    from the file extension, ".prom" selects Prometheus, anything else JSON.
+    """
+    if fmt is None:
+        fmt = "prometheus" if filename.endswith(".prom") else "json"
+    try:
+        return SINKS[fmt](filename)
+    except KeyError:
+        raise MetricsError(f"'{fmt}' is not a valid metrics format, choose one of {list(SINKS)}")
@@ -0,0 +1,118 @@
+"""
+`current` reports the version of a running program from its version
+file, cheaply enough to call on every health check or metrics scrape.
+
+The parsed `Version` is cached per file. A cached version is
+revalidated at most once every `interval` seconds, and only with an
+`os.stat`. The file is re-read only when its mtime, size or inode has
+changed. In frozen mode the file is read once and never checked again.
+
+The first lookup of a file reads it inline, so that caller waits on the
+read. Threads that race to read a file for the first time each read it,
+and the first to finish publishes its entry for all of them. Reading one
+file never holds up lookups of another.
+
+When an entry is stale, the thread that takes its lock without blocking
+revalidates it inline, so that caller waits on the `os.stat` and, if the
+file changed, on the re-read. Every other thread, including those that
+fail to get the lock, returns the cached version at once. If a refresh
+fails, e.g. because the file was caught half edited, the last good
+version is kept and the file is checked again after the next interval.
+"""
+
+import os
+import threading
+import time
+
+from . import Version, VersionError
+from .extractors import extractor_for
+
+_entries = {}  # (absolute path, label, separator) -> _Entry
+_lock = threading.Lock()  # guards publishing entries, never held during I/O
+
+
+class _Entry:
+
+    __slots__ = ("version", "stamp", "checked", "lock")
+
+    def __init__(self):
+        self.version = None
+        self.stamp = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _read(path, label, separator):
+    extractor = extractor_for(path)
+    v = extractor.find(path) if extractor else Version.find(path, label, separator)
+    if v is None:
+        raise VersionError(f"No '{label}' version in '{path}'")
+    return v
+
+
+def _load(entry, path, label, separator):
+    stamp = _stamp(path)
+    entry.version = _read(path, label, separator)
+    entry.stamp = stamp
+    entry.checked = time.monotonic()
+
+
+def current(path="VERSION", label="VERSION", separator="=", interval=1.0, frozen=False):
+    """
+    Return the version held in `path`, from the cache where possible.
+
+    The returned `Version` is shared between callers and must not be
+    modified, copy it first.
+
+    :param path: the version file
+    :param label: the version label
+    :param separator: the label separator
+    :param interval: the minimum number of seconds between checks of the file
+    :param frozen: never check the file again once it has been read
+    :raises VersionError: if the first read of `path` finds no valid version
+    :raises OSError: if the first read of `path` fails
+    """
+    key = (os.path.abspath(path), label, separator)
+    entry = _entries.get(key)
+    if entry is None:
+        # load outside the lock, so a slow file never holds up other files,
+        # then publish unless another thread got there first
+        loaded = _Entry()
+        _load(loaded, path, label, separator)
+        with _lock:
+            entry = _entries.setdefault(key, loaded)
+        return entry.version
+
+    if frozen or time.monotonic() - entry.checked < interval:
+        return entry.version
+
+    if entry.lock.acquire(blocking=False):
+        try:
+            entry.checked = time.monotonic()
+            stamp = _stamp(path)
+            if stamp != entry.stamp:
+                entry.version = _read(path, label, separator)
+                entry.stamp = stamp
+        except (OSError, VersionError):
+            pass  # keep serving the last good version
+        finally:
+            entry.lock.release()
+    return entry.version
+
+
+def forget(path=None):
+    """
+    Drop the cached versions of `path`, or of every file.
+    """
+    with _lock:
+        if path is None:
+            _entries.clear()
+        else:
+            path = os.path.abspath(path)
+            for key in [k for k in _entries if k[0] == path]:
+                del _entries[key]
@@ -0,0 +1,180 @@
+"""
+Full SemVer 2.0.0 versions, with arbitrary dot separated pre-release
+identifiers and build metadata, e.g. `1.2.3-rc.1+build.5`.
+
+`Version` only allows the "alpha" and "beta" tags because it knows how
+to bump them. `SemVer` represents any valid semantic version and orders
+versions by the precedence rules of the specification:
+
+* MAJOR, MINOR and PATCH compare numerically
+* a pre-release version has lower precedence than the release
+* pre-release identifiers compare left to right, numeric identifiers
+  numerically and below alphanumeric ones, which compare in ASCII order
+* a longer list of identifiers wins when all the shared ones are equal
+* build metadata is ignored
+
+`SemVer.parse` tries a regular expression for the common `x.y.z` and
+`x.y.z-alphaN` forms first and only falls back to the full grammar when
+that fails.
+"""
+
+import re
+from functools import total_ordering
+
+from . import Version, VersionError
+
+_FAST = re.compile(r"(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)(?:-((?:alpha|beta)\d*))?\Z")
+
+_IDENT = r"(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)"
+_FULL = re.compile(r"(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)"
+                   r"(?:-(" + _IDENT + r"(?:\." + _IDENT + r")*))?"
+                   r"(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?\Z")
+
+_TAG = re.compile(r"(alpha|beta)(\d+)\Z")
+
+
+def _identifier_key(identifier):
+    if identifier.isdigit():
+        return 0, int(identifier), ""
+    return 1, 0, identifier
+
+
+@total_ordering
+class SemVer:
+    """
+    An immutable SemVer 2.0.0 version.
+
+    :param major: 0-n
+    :param minor: 0-n
+    :param patch: 0-n
+    :param prerelease: a tuple of pre-release identifiers, e.g. ("rc", "1")
+    :param build: a tuple of build metadata identifiers, e.g. ("build", "5")
+    """
+
+    __slots__ = ("_major", "_minor", "_patch", "_prerelease", "_build", "_key")
+
+    def __init__(self, major=0, minor=0, patch=0, prerelease=(), build=()):
+        for value in (major, minor, patch):
+            if not isinstance(value, int) or value < 0:
+                raise VersionError(f"{value} is not an int type or is a negative int")
+        self._major = major
+        self._minor = minor
+        self._patch = patch
+        self._prerelease = tuple(prerelease)
+        self._build = tuple(build)
+        if self._prerelease:
+            pre_key = (0, tuple(_identifier_key(i) for i in self._prerelease))
+        else:
+            pre_key = (1, ())
+        self._key = (major, minor, patch, pre_key)
+
+    @property
+    def major(self):
+        return self._major
+
+    @property
+    def minor(self):
+        return self._minor
+
+    @property
+    def patch(self):
+        return self._patch
+
+    @property
+    def prerelease(self):
+        return self._prerelease
+
+    @property
+    def build(self):
+        return self._build
+
+    @staticmethod
+    def parse(text):
+        """
+        Parse a bare SemVer string such as "1.2.3-rc.1+build.5".
+
+        :raises VersionError: if `text` is not a valid semantic version
+        """
+        text = text.strip().strip("\"'")
+        match = _FAST.match(text)
+        if match:
+            major, minor, patch, tag = match.groups()
+            return SemVer(int(major), int(minor), int(patch), (tag,) if tag else ())
+
+        match = _FULL.match(text)
+        if not match:
+            raise VersionError(f"'{text}' is not a valid semantic version")
+        major, minor, patch, prerelease, build = match.groups()
+        return SemVer(int(major), int(minor), int(patch),
+                      prerelease.split(".") if prerelease else (),
+                      build.split(".") if build else ())
+
+    @staticmethod
+    def find(filename, lhs="VERSION", separator="="):
+        """
+        Parse the first `lhs` line of `filename` as a `SemVer`.
+
+        :return: a `SemVer` or None if there is no `lhs` line
+        """
+        with open(filename, "r", errors="replace") as file:
+            for line in file:
+                line = line.strip()
+                if line.startswith(lhs):
+                    label, sep, rhs = line.partition(separator)
+                    if not sep or label.strip() != lhs:
+                        raise VersionError(f"{line} has wrong left hand side {label.strip()}")
+                    return SemVer.parse(rhs)
+        return None
+
+    @staticmethod
+    def from_version(version):
+        """
+        :param version: a `Version`
+        :return: the equivalent `SemVer`
+        """
+        prerelease = (f"{version.tag}{version.tag_version}",) if version.tag else ()
+        return SemVer(version.major, version.minor, version.patch, prerelease)
+
+    def to_version(self, lhs="VERSION", separator="="):
+        """
+        :return: the equivalent `Version`
+        :raises VersionError: if this version can't be represented as a `Version`
+        """
+        if self._build:
+            raise VersionError(f"{self} has build metadata, which Version does not support")
+        if not self._prerelease:
+            return Version(self._major, self._minor, self._patch, "", lhs=lhs, separator=separator)
+        match = _TAG.match(self._prerelease[0]) if len(self._prerelease) == 1 else None
+        if not match:
+            raise VersionError(f"{self} has a pre-release that is not alpha<n> or beta<n>")
+        return Version(self._major, self._minor, self._patch, match.group(1), int(match.group(2)),
+                       lhs=lhs, separator=separator)
+
+    def __eq__(self, other):
+        if not isinstance(other, SemVer):
+            return NotImplemented
+        return self._key == other._key
+
+    def __lt__(self, other):
+        if not isinstance(other, SemVer):
+            return NotImplemented
+        return self._key < other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    @property
+    def bare_version(self):
+        return str(self)
+
+    def __str__(self):
+        text = f"{self._major}.{self._minor}.{self._patch}"
+        if self._prerelease:
+            text += "-" + ".".join(self._prerelease)
+        if self._build:
+            text += "+" + ".".join(self._build)
+        return text
+
+    def __repr__(self):
+        return f"{self.__class__.__qualname__}({self._major}, {self._minor}, {self._patch}, " \
+               f"{self._prerelease!r}, {self._build!r})"
@@ -0,0 +1,116 @@
+"""
+Split a run across CI nodes and merge the per-node results.
+
+`--shard i/N` keeps only the files that belong to shard i (counting from
+1) of N. Files are assigned by a CRC32 of their normalised path relative
+to a root (the config file's directory, or the current directory), so
+every node computes the same partition without talking to the others,
+whatever directory the checkout lives in and whether the files were
+named by absolute or relative paths.
+
+Each node writes its results as NDJSON (one JSON object per line with
+"path" and "version" or "error") or as a manifest (see
+`semvermanager.manifest`). `merge` combines the per-shard files into one
+sorted result.
+"""
+
+import heapq
+import json
+import os
+import zlib
+
+from . import manifest
+
+
+class ShardError(ValueError):
+    pass
+
+
+def parse_shard(text):
+    """
+    :param text: "i/N" with 1 <= i <= N
+    :return: a tuple (i, N)
+    """
+    try:
+        index, _, total = text.partition("/")
+        index, total = int(index), int(total)
+    except ValueError:
+        raise ShardError(f"'{text}' is not a shard, use i/N e.g. 1/4")
+    if not 1 <= index <= total:
+        raise ShardError(f"shard index {index} is not between 1 and {total}")
+    return index, total
+
+
+def normalise(path):
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def relative(path, root=None):
+    """
+    :param root: the directory `path` is made relative to. If None a
+        relative `path` is taken as already relative to the root, and an
+        absolute one is made relative to the current directory.
+    :return: `path` relative to `root`, normalised
+    """
+    if root is not None or os.path.isabs(path):
+        path = os.path.relpath(os.path.abspath(path), root)
+    return normalise(path)
+
+
+def shard_of(path, total, root=None):
+    """
+    :param root: see `relative`
+    :return: the shard, counting from 1, that `path` belongs to
+    """
+    return zlib.crc32(relative(path, root).encode()) % total + 1
+
+
+def select(paths, index, total, root=None):
+    """
+    Yield the members of `paths` that belong to shard `index` of `total`.
+
+    :param root: see `relative`
+    """
+    for path in paths:
+        if shard_of(path, total, root) == index:
+            yield path
+
+
+def record(path, version=None, error=None):
+    """
+    :return: one NDJSON line for `path`
+    """
+    if error is not None:
+        return json.dumps({"path": normalise(path), "error": str(error)})
+    return json.dumps({"path": normalise(path), "version": version.bare_version if version else None})
+
+
+def _read_ndjson(filename):
+    with open(filename, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _is_manifest(filename):
+    with open(filename, "r") as file:
+        return file.readline() == manifest.HEADER
+
+
+def merge(filenames):
+    """
+    Merge per-shard outputs, which must all be NDJSON or all be manifests.
+
+    :return: a tuple (kind, iterator) where kind is "ndjson", yielding
+        dicts sorted by path, or "manifest", yielding `ManifestEntry` records
+        in manifest order
+    """
+    kinds = {_is_manifest(f) for f in filenames}
+    if len(kinds) > 1:
+        raise ShardError("Can't merge a mixture of manifests and NDJSON files")
+    if kinds == {True}:
+        streams = [manifest.read(f) for f in filenames]
+        return "manifest", heapq.merge(*streams, key=lambda e: (manifest.sort_key(e.path), e.line))
+    records = [r for f in filenames for r in _read_ndjson(f)]
+    records.sort(key=lambda r: manifest.sort_key(r["path"]))
+    return "ndjson", iter(records)
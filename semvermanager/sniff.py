@@ -0,0 +1,98 @@
+"""
+Skip files that can't hold a version line before reading them.
+
+A `FileFilter` rejects a file, cheapest test first, when:
+
+* its extension is in a list of binary formats
+* it is larger than `max_size` bytes, judged by `os.stat`
+* its first block contains a NUL byte
+
+Only the first block of a file is read, so a scan that meets a large
+binary costs one small read rather than seconds of decoding. Text in
+another encoding, e.g. a Latin-1 comment, is not binary: version files
+are read with replacement of undecodable bytes. The filter counts what
+it skips by reason, for the run summary.
+
+The filter is for reads. The CLI applies it to --getversion and
+--snapshot, and --check-consistent reports a filtered file as an error.
+Files named for --bump or --update are never filtered.
+"""
+
+import os
+import threading
+from collections import Counter
+
+DEFAULT_MAX_SIZE = 1 << 20  # 1MiB, far more than any real version file
+
+SNIFF_SIZE = 8192
+
+BINARY_EXTENSIONS = frozenset({
+    ".7z", ".a", ".bin", ".bmp", ".bz2", ".class", ".dll", ".dylib", ".exe", ".gif", ".gz", ".ico",
+    ".jar", ".jpeg", ".jpg", ".mo", ".o", ".obj", ".pdf", ".png", ".pyc", ".pyd", ".pyo", ".so",
+    ".sqlite", ".tar", ".tgz", ".ttf", ".wasm", ".webp", ".whl", ".woff", ".woff2", ".xz", ".zip",
+})
+
+EXTENSION = "extension"
+TOO_LARGE = "too large"
+BINARY = "binary"
+
+
+class FileFilter:
+    """
+    :param max_size: skip files larger than this many bytes, None for no limit
+    :param extensions: skip files with these extensions, e.g. {".png"}
+    :param sniff_size: the number of bytes read to sniff for binary content
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, extensions=BINARY_EXTENSIONS, sniff_size=SNIFF_SIZE):
+        self._max_size = max_size
+        self._extensions = frozenset(e.lower() for e in extensions)
+        self._sniff_size = sniff_size
+        self._lock = threading.Lock()
+        self.skipped = Counter()  # reason -> number of files skipped
+
+    @staticmethod
+    def is_binary(block):
+        """
+        :param block: the first bytes of a file
+        :return: True if `block` holds a NUL byte, which no text encoding a
+            version file could use does
+        """
+        return b"\0" in block
+
+    def reason(self, filename):
+        """
+        :return: why `filename` should be skipped, or None if it should be read.
+            Files that can't be examined are left for the reader to report.
+        """
+        if os.path.splitext(filename)[1].lower() in self._extensions:
+            return EXTENSION
+        try:
+            if self._max_size is not None and os.stat(filename).st_size > self._max_size:
+                return TOO_LARGE
+            with open(filename, "rb") as file:
+                block = file.read(self._sniff_size)
+        except OSError:
+            return None
+        return BINARY if self.is_binary(block) else None
+
+    def skip(self, filename):
+        """
+        :return: why `filename` should be skipped, counting it if so, or
+            None if it should be read
+        """
+        why = self.reason(filename)
+        if why is not None:
+            with self._lock:
+                self.skipped[why] += 1
+        return why
+
+    def summary(self):
+        """
+        :return: a one line summary of the files skipped, or "" if there were none
+        """
+        total = sum(self.skipped.values())
+        if not total:
+            return ""
+        reasons = ", ".join(f"{n} {why}" for why, n in sorted(self.skipped.items()))
+        return f"Skipped {total} files that can't hold a version ({reasons})"
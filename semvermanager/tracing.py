@@ -0,0 +1,155 @@
+"""
+Optional tracing spans around file I/O, parsing and `OperationRunner`
+dispatch.
+
+A `Tracer` records nested, timed spans with free form attributes (file
+path, characters read, lines matched...). Spans are collected in memory
+and can be exported as a Chrome trace JSON file which loads directly into
+chrome://tracing or https://ui.perfetto.dev.
+
+When tracing is not requested the shared `NULL_TRACER` is used, its spans
+do nothing.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class Span:
+    """
+    A single timed region. Attributes may be added while the span is
+    open using `set`.
+    """
+
+    __slots__ = ("name", "attrs", "start", "end", "depth", "tid")
+
+    def __init__(self, name, attrs, depth, tid):
+        self.name = name
+        self.attrs = attrs
+        self.depth = depth
+        self.tid = tid
+        self.start = 0.0
+        self.end = 0.0
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class _SpanContext:
+
+    __slots__ = ("_tracer", "_span")
+
+    def __init__(self, tracer, span):
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self):
+        self._tracer._push(self._span)
+        self._span.start = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._span.end = time.perf_counter()
+        if exc_type:
+            self._span.attrs["error"] = exc_type.__name__
+        self._tracer._pop(self._span)
+        return False
+
+
+class Tracer:
+
+    enabled = True
+
+    def __init__(self):
+        self._spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _push(self, span):
+        self._stack().append(span)
+
+    def _pop(self, span):
+        self._stack().pop()
+        with self._lock:
+            self._spans.append(span)
+
+    def span(self, name, **attrs):
+        """
+        Create a span to be used as a context manager::
+
+            with tracer.span("Version.find", path=filename) as span:
+                span.set("lines_matched", 1)
+
+        :param name: the span name
+        :param attrs: initial attributes for the span
+        :return: a context manager yielding the `Span`
+        """
+        return _SpanContext(self, Span(name, attrs, len(self._stack()), threading.get_ident()))
+
+    @property
+    def spans(self):
+        """Finished spans in the order they were closed"""
+        return list(self._spans)
+
+    def to_chrome_trace(self):
+        """
+        :return: the finished spans as a Chrome trace event dict
+        """
+        pid = os.getpid()
+        events = []
+        for span in self._spans:
+            events.append({"name": span.name,
+                           "ph": "X",
+                           "ts": (span.start - self._origin) * 1e6,
+                           "dur": span.duration * 1e6,
+                           "pid": pid,
+                           "tid": span.tid,
+                           "args": {k: str(v) for k, v in span.attrs.items()}})
+        events.sort(key=lambda e: e["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, filename):
+        """
+        Write the finished spans to `filename` in Chrome trace format.
+        """
+        with open(filename, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+        return filename
+
+
+class _NullSpan:
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class NullTracer(Tracer):
+
+    enabled = False
+    _SPAN = _NullSpan()
+
+    def span(self, name, **attrs):
+        return NullTracer._SPAN
+
+
+NULL_TRACER = NullTracer()
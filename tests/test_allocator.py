@@ -0,0 +1,81 @@
+import unittest
+import os
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import temp
+
+from semvermanager import Version, VersionError, main
+from semvermanager.allocator import BuildNumberAllocator
+
+
+def _reserve(args):
+    filename, n = args
+    with BuildNumberAllocator(filename) as allocator:
+        return [allocator.reserve()[0] for _ in range(n)]
+
+
+class TestAllocator(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = temp.tempfile()
+        Version(1, 2, 0, "beta", 3).write(self.filename)
+
+    def tearDown(self):
+        for f in [self.filename, self.filename + ".buildno", self.filename + ".old"]:
+            if os.path.isfile(f):
+                os.unlink(f)
+
+    def test_reserve(self):
+        with BuildNumberAllocator(self.filename) as allocator:
+            self.assertEqual(allocator.reserve(), range(4, 5))
+            self.assertEqual(allocator.reserve(3), range(5, 8))
+            self.assertEqual(allocator.next_version(), Version(1, 2, 0, "beta", 8))
+        # the version file itself is untouched
+        self.assertEqual(Version.find(self.filename), Version(1, 2, 0, "beta", 3))
+
+    def test_base_change_resets(self):
+        with BuildNumberAllocator(self.filename) as allocator:
+            allocator.reserve(10)
+        Version.bump_file(self.filename, "patch")
+        with BuildNumberAllocator(self.filename) as allocator:
+            self.assertEqual(allocator.next_version(), Version(1, 2, 1, "beta", 4))
+
+    def test_stale_base_never_resets(self):
+        stale = BuildNumberAllocator(self.filename)
+        Version.bump_file(self.filename, "patch")
+        with BuildNumberAllocator(self.filename) as allocator:
+            allocator.reserve(10)
+        # the stale allocator catches up with the version file rather than restarting the count
+        self.assertEqual(stale.next_version(), Version(1, 2, 1, "beta", 14))
+        stale.close()
+
+        # a version file moved backwards is an error, not a fresh count
+        Version(1, 2, 0, "beta", 3).write(self.filename)
+        with BuildNumberAllocator(self.filename) as allocator:
+            self.assertRaises(VersionError, allocator.reserve)
+
+    def test_release_rejected(self):
+        Version(1, 2, 0, "").write(self.filename)
+        self.assertRaises(VersionError, BuildNumberAllocator, self.filename)
+
+    def test_cli_reserve_needs_one(self):
+        with mock.patch("sys.stderr"):
+            for n in ["0", "-1"]:
+                self.assertRaises(SystemExit, main, ["--reserve", n, self.filename])
+        self.assertFalse(os.path.isfile(self.filename + ".buildno"))
+
+    def test_no_duplicates(self):
+        allocator = BuildNumberAllocator(self.filename)
+        with ThreadPoolExecutor(8) as pool:
+            numbers = [n for r in pool.map(lambda _: allocator.reserve(), range(200)) for n in r]
+        allocator.close()
+        with multiprocessing.Pool(4) as pool:
+            for chunk in pool.map(_reserve, [(self.filename, 100)] * 4):
+                numbers.extend(chunk)
+        self.assertEqual(sorted(numbers), list(range(4, 604)))
+
+
+if __name__ == '__main__':
+    unittest.main()
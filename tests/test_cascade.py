@@ -0,0 +1,97 @@
+import unittest
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from semvermanager import Version, main
+from semvermanager import config
+from semvermanager.cascade import cascade, levels, plan, execute, CascadeError
+
+CONFIG = """
+[[file]]
+path = "core/VERSION"
+name = "core"
+
+[[file]]
+path = "util/VERSION"
+name = "util"
+depends = ["core"]
+
+[[file]]
+path = "app/VERSION"
+name = "app"
+depends = ["util", "core"]
+
+[[file]]
+path = "other/VERSION"
+name = "other"
+"""
+
+
+@unittest.skipIf(config.tomllib is None, "no TOML parser is installed")
+class TestCascade(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name in ("core", "util", "app", "other"):
+            os.mkdir(os.path.join(self.root, name))
+            Version(1, 2, 3, "").write(os.path.join(self.root, name, "VERSION"))
+        self.filename = os.path.join(self.root, "semver.toml")
+        with open(self.filename, "w") as file:
+            file.write(CONFIG)
+        self.config = config.load(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_cascade_and_levels(self):
+        graph = self.config.graph()
+        self.assertEqual(cascade(graph, {"core": "minor"}), {"core": "minor", "util": "patch", "app": "patch"})
+        self.assertEqual(cascade(graph, {"core": "patch", "app": "major"})["app"], "major")
+        self.assertEqual(levels(graph, ["core", "util", "app"]), [["core"], ["util"], ["app"]])
+        self.assertEqual(levels(graph, ["core", "app"]), [["core"], ["app"]])
+        self.assertRaises(CascadeError, levels, {"a": ["b"], "b": ["a"]}, ["a", "b"])
+
+    def test_plan_and_execute(self):
+        planned = plan(self.config, {"core": "minor"})
+        self.assertEqual([[p.name for p in level] for level in planned], [["core"], ["util"], ["app"]])
+        self.assertEqual(planned[0][0].new, Version(1, 3, 0, ""))
+        self.assertEqual(Version.find(self.config.file("core").path), Version(1, 2, 3, ""))
+
+        bumped, errors = execute(self.config, planned)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(bumped), 3)
+        self.assertEqual(Version.find(self.config.file("app").path), Version(1, 2, 4, ""))
+        self.assertEqual(Version.find(self.config.file("other").path), Version(1, 2, 3, ""))
+
+    def test_conflict_stops_cascade(self):
+        planned = plan(self.config, {"core": "minor"})
+        Version(2, 0, 0, "").write(self.config.file("core").path)
+        bumped, errors = execute(self.config, planned)
+        self.assertEqual((bumped, [p.name for p, _ in errors]), ([], ["core"]))
+        self.assertEqual(Version.find(self.config.file("util").path), Version(1, 2, 3, ""))
+
+    def test_dry_run(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["--config", self.filename, "--bump", "minor", "--cascade", "--dry-run", "core"])
+        self.assertIn("level 2: app 1.2.3 -> 1.2.4 (patch)", out.getvalue())
+        self.assertEqual(Version.find(self.config.file("core").path), Version(1, 2, 3, ""))
+
+    def test_default_config(self):
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            out = StringIO()
+            with redirect_stdout(out):
+                main(["--bump", "minor", "--cascade", "core"])
+            self.assertIn("Bumped 3 of 3 packages", out.getvalue())
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(Version.find(self.config.file("app").path), Version(1, 2, 4, ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
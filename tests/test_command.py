@@ -1,5 +1,15 @@
 import unittest
-from semvermanager import command
+import os
+import queue
+import itertools
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from semvermanager import command, Version, BumpCommand
+from semvermanager.channel import LocalChannel
 
 
 class TestCommand(unittest.TestCase):
@@ -8,6 +18,153 @@ class TestCommand(unittest.TestCase):
         cmd(1, 2, 3, 4, this="that", these="those")
         self.assertEqual(cmd.q.get(), "1, 2, 3, 4")
 
+    def test_runner_results(self):
+        runner = command.OperationRunner(command.EchoCommand())
+        self.assertEqual(list(runner.results([1, 2], "x")), ["1, x", "", "2, x", ""])
+
+    def test_runner_stream(self):
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        class CountingCommand(command.Command):
+            def __call__(self, n):
+                with lock:
+                    in_flight.append(n)
+                    peak.append(len(in_flight))
+                time.sleep(0.001)
+                with lock:
+                    in_flight.remove(n)
+                if n == 3:
+                    raise command.CommandError("three")
+                self.q.put(n)
+                return self
+
+        runner = command.OperationRunner(CountingCommand(), quiet=True)
+        results = list(runner.stream(iter(range(50)), window=4, workers=8))
+        self.assertEqual(results, [n for n in range(50) if n != 3])
+        self.assertLessEqual(max(peak), 4)
+        self.assertEqual([(f, str(e)) for _, f, e in runner.errors], [(3, "three")])
+
+        started = []
+        gen = runner.stream((started.append(n) or n for n in range(1000)), window=4, workers=2)
+        self.assertEqual(next(gen), 0)
+        self.assertLessEqual(len(started), 5)  # backpressure: the rest are never read
+        gen.close()
+
+    def test_runner_timeout_and_deadline(self):
+        release = threading.Event()
+
+        class SlowCommand(command.Command):
+            def __call__(self, filename):
+                if filename == "hung":
+                    release.wait(5)
+                self.q.put(filename)
+                return self
+
+        runner_name = SlowCommand.__qualname__
+        runner = command.OperationRunner(SlowCommand(), quiet=True, timeout=0.05)
+        self.assertEqual(list(runner.results(["a", "hung", "b"])), ["a", "b"])
+        self.assertEqual(runner.timed_out, [(runner_name, "hung")])
+        release.set()  # the abandoned call must not leak into later results
+        time.sleep(0.01)
+        self.assertEqual(list(runner.results(["c"])), ["c"])
+
+        release.clear()
+        runner = command.OperationRunner(SlowCommand(), quiet=True, deadline=0.05)
+        listing = iter(["a", "hung", "b", "c"])
+        self.assertEqual(list(runner.results(listing)), ["a"])
+        self.assertEqual(runner.timed_out, [(runner_name, "hung")])
+        self.assertEqual(runner.cancelled, 1)
+        self.assertTrue(runner.stopped_early)
+        self.assertEqual(list(listing), ["c"])  # left unread
+        release.set()
+
+        runner = command.OperationRunner(SlowCommand(), timeout=1)
+        runner.cancel()
+        self.assertEqual(list(runner.results(itertools.count())), [])
+        self.assertEqual(runner.cancelled, 1)
+
+    def test_stream_deadline_from_pickup(self):
+        class Sleep(command.Command):
+            def __call__(self, filename):
+                time.sleep(0.05)
+                self.q.put(filename)
+                return self
+
+        runner = command.OperationRunner(Sleep(), quiet=True, deadline=0.15)
+        start = time.monotonic()
+        done = list(runner.stream(range(20), window=20, workers=1))
+        # files queued at the start but picked up after the deadline are not started
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(done) + len(runner.timed_out) + runner.cancelled, 20)
+        self.assertGreater(runner.cancelled, 10)
+        self.assertFalse(runner.stopped_early)
+
+        # an endless listing is abandoned unread once the deadline passes
+        runner = command.OperationRunner(Sleep(), quiet=True, deadline=0.1)
+        self.assertGreater(len(list(runner.stream(itertools.count(), window=2, workers=2))), 0)
+        self.assertGreaterEqual(runner.cancelled, 1)
+        self.assertTrue(runner.stopped_early)
+
+    def test_stream_close_counts_cancelled(self):
+        class Sleep(command.Command):
+            def __call__(self, filename):
+                time.sleep(0.02)
+                self.q.put(filename)
+                return self
+
+        runner = command.OperationRunner(Sleep())
+        gen = runner.stream(range(100), window=8, workers=1)
+        self.assertEqual(next(gen), 0)
+        gen.close()
+        # 8 files were in flight when the first result was taken, one or two of them already running
+        self.assertIn(runner.cancelled, (6, 7))
+        self.assertTrue(runner.stopped_early)
+
+    def test_timed_out_write_is_not_applied(self):
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, "VERSION")
+        Version(1, 0, 0, "").write(filename)
+        release = threading.Event()
+        swap = Version._swap
+
+        def slow_swap(*args, **kwargs):  # the new file is written, the old one not yet replaced
+            release.wait(5)
+            return swap(*args, **kwargs)
+
+        try:
+            with mock.patch.object(Version, "_swap", staticmethod(slow_swap)):
+                runner = command.OperationRunner(BumpCommand(), quiet=True, timeout=0.05)
+                self.assertEqual(list(runner.results([filename], "VERSION", "=", "minor")), [])
+                self.assertEqual(len(runner.timed_out), 1)
+                release.set()
+                for t in threading.enumerate():
+                    if t.name.endswith(filename):
+                        t.join(5)
+            self.assertEqual(Version.find(filename), Version(1, 0, 0, ""))
+            self.assertEqual(sorted(os.listdir(directory)), ["VERSION"])  # the temp file is gone too
+
+            # a write that has claimed its commit is waited for, not reported as timed out
+            commit = command.Commit()
+            self.assertTrue(commit.claim())
+            self.assertFalse(commit.abandon())
+            self.assertTrue(command.Commit().abandon())
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestChannel(unittest.TestCase):
+
+    def test_local_channel(self):
+        c = LocalChannel()
+        self.assertTrue(c.empty())
+        c.put(1)
+        c.put(2)
+        self.assertEqual(len(c), 2)
+        self.assertEqual(list(c.drain()), [1, 2])
+        self.assertRaises(queue.Empty, c.get)
+
 
 if __name__ == '__main__':
     unittest.main()
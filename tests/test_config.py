@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from semvermanager import Version, main
+from semvermanager import config
+from semvermanager.config import ConfigError
+from semvermanager.extractors import extractor_for
+
+CONFIG = """
+label = "VERSION"
+
+[[file]]
+path = "setup.py"
+
+[[file]]
+path = "conf.py"
+label = "release"
+
+[[file]]
+path = "version.json"
+format = "package.json"
+"""
+
+
+@unittest.skipIf(config.tomllib is None, "no TOML parser is installed")
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.filename = self.write("semver.toml", CONFIG)
+        self.write("setup.py", "NAME = 'x'\nVERSION = '1.2.3'\n")
+        self.write("conf.py", "version = '1.2'\nrelease = '1.2.3'\n")
+        self.write("version.json", '{"name": "x", "version": "1.2.3"}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        filename = os.path.join(self.root, path)
+        with open(filename, "w") as file:
+            file.write(text)
+        return filename
+
+    def test_compile(self):
+        c = config.load(self.filename)
+        self.assertEqual([f.label for f in c.files], ["VERSION", "release", "VERSION"])
+        self.assertEqual(c.file(os.path.join(self.root, "version.json")).format, "package.json")
+        self.assertIsNotNone(extractor_for(os.path.join(self.root, "version.json")))
+        self.assertEqual([v for _, v in c.versions()], [Version(1, 2, 3, "")] * 3)
+        self.assertEqual(list(c.groups().keys()), [("VERSION", "="), ("release", "=")])
+
+    def test_cache(self):
+        c = config.load(self.filename)
+        self.assertIs(config.load(self.filename), c)
+        self.write("semver.toml", CONFIG + "\n[[file]]\npath = \"VERSION\"\n")
+        self.assertEqual(len(config.load(self.filename).files), 4)
+
+    def test_release(self):
+        json_path = os.path.join(self.root, "version.json")
+        c = config.load(self.filename)
+        self.assertIsNotNone(extractor_for(json_path))
+        self.write("semver.toml", CONFIG.replace('format = "package.json"', 'format = "auto"') + "\n")
+        config.load(self.filename)  # recompiling drops the old config's assignments
+        self.assertIsNone(extractor_for(json_path))
+        c.release()
+        self.assertIsNone(extractor_for(json_path))
+
+    def test_errors(self):
+        self.assertRaises(ConfigError, config.load, os.path.join(self.root, "missing.toml"))
+        self.assertRaises(ConfigError, config.parse, "[[file]\n")
+        self.assertRaises(ConfigError, config.parse, "[[file]]\nlabel = 'x'\n")
+        self.assertRaises(ConfigError, config.parse, "[[file]]\npath = 'x'\nformat = 'yaml'\n")
+
+    def test_main(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["--config", self.filename, "--bump", "minor"])
+        self.assertEqual(out.getvalue().count("1.3.0"), 3)
+        self.assertEqual(Version.find(os.path.join(self.root, "conf.py"), "release"), Version(1, 3, 0, ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import os
+import json
+
+import temp
+
+from semvermanager import Version
+from semvermanager.consistency import check_consistent, ConsistencyResult, CONSISTENT, INCONSISTENT, ERROR
+
+
+class TestConsistency(unittest.TestCase):
+
+    def setUp(self):
+        self.files = [temp.tempfile() for _ in range(4)]
+        for f in self.files:
+            Version(1, 2, 3, "").write(f)
+
+    def tearDown(self):
+        for f in self.files:
+            if os.path.isfile(f):
+                os.unlink(f)
+
+    def test_consistent(self):
+        result = check_consistent(self.files)
+        self.assertTrue(result.consistent)
+        self.assertEqual(result.exit_code, CONSISTENT)
+        self.assertEqual(result.versions(), [(Version(1, 2, 3, ""), result.groups["1.2.3"])])
+
+    def test_inconsistent(self):
+        Version(1, 2, 4, "").write(self.files[1])
+        result = check_consistent(self.files)
+        self.assertEqual(result.exit_code, INCONSISTENT)
+        (major, many), (minor, few) = result.versions()
+        self.assertEqual(major, Version(1, 2, 3, ""))
+        self.assertEqual(few, [self.files[1]])
+
+        result = check_consistent(self.files, fail_fast=True, workers=1)
+        self.assertEqual(result.exit_code, INCONSISTENT)
+        self.assertEqual(sum(len(f) for f in result.groups.values()), 2)
+
+    def test_labels_and_errors(self):
+        with open(self.files[2], "w") as file:
+            file.write("release = '1.2.3'\n")
+        targets = [self.files[0], (self.files[2], "release", "=")]
+        self.assertTrue(check_consistent(targets).consistent)
+
+        result = check_consistent(self.files + ["no_such_file"])
+        self.assertEqual(result.exit_code, ERROR)
+        self.assertEqual(set(result.errors), {self.files[2], "no_such_file"})
+
+    def test_large_fields(self):
+        for f in self.files:
+            Version(1, 0, 70000, "beta", 20000).write(f)
+        result = check_consistent(self.files)
+        self.assertEqual(result.exit_code, CONSISTENT)
+        self.assertEqual(result.versions(), [(Version(1, 0, 70000, "beta", 20000), result.groups["1.0.70000-beta20000"])])
+        self.assertEqual(ConsistencyResult.from_records(map(json.loads, result.records())).exit_code, CONSISTENT)
+
+        Version(1, 0, 70001, "beta", 20000).write(self.files[0])
+        self.assertEqual(check_consistent(self.files).exit_code, INCONSISTENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+
+from semvermanager import Version, VersionError, main
+from semvermanager import convert
+
+
+class TestConvert(unittest.TestCase):
+
+    def setUp(self):
+        self.versions = [Version(1, 2, 3, ""), Version(1, 2, 3, "alpha", 0), Version(1, 2, 3, "alpha", 1),
+                         Version(10, 0, 7, "beta", 12)]
+
+    def test_render(self):
+        self.assertEqual([convert.to_pep440(v) for v in self.versions], ["1.2.3", "1.2.3a0", "1.2.3a1", "10.0.7b12"])
+        self.assertEqual([convert.to_npm(v) for v in self.versions],
+                         ["1.2.3", "1.2.3-alpha.0", "1.2.3-alpha.1", "10.0.7-beta.12"])
+        self.assertEqual([convert.render(v, "semver") for v in self.versions], [v.bare_version for v in self.versions])
+        self.assertRaises(VersionError, convert.render, self.versions[0], "maven")
+
+    def test_round_trip(self):
+        self.assertEqual(set(convert.PEP440_TAGS), set(Version.TAGS.values()))
+        for style in convert.STYLES:
+            for v in self.versions:
+                self.assertEqual(convert.parse(convert.render(v, style), style), v)
+        self.assertEqual(convert.from_pep440("1.2.3b"), Version(1, 2, 3, "beta", 0))
+        self.assertEqual(convert.from_npm("1.2.3-beta.2", lhs="release").lhs, "release")
+        for bad in ("1.2.3rc1", "1.2", "01.2.3", "1.2.3-alpha1"):
+            self.assertRaises(VersionError, convert.from_pep440, bad)
+        self.assertRaises(VersionError, convert.from_npm, "1.2.3-rc.1")
+
+    def test_many(self):
+        column = self.versions * 3
+        rendered = convert.render_many(column, "npm")
+        self.assertEqual(rendered, [convert.to_npm(v) for v in column])
+        self.assertEqual(convert.render_many([v.pack() for v in column], "npm"), rendered)
+        self.assertEqual(convert.render_many(Version.pack_many(column), "npm"), rendered)
+
+        keys = convert.parse_many(rendered, "npm", packed=True)
+        self.assertEqual(keys, [v.pack() for v in column])
+        parsed = convert.parse_many(rendered, "npm")
+        self.assertEqual(parsed, column)
+        self.assertIs(parsed[0], parsed[4])  # one Version per distinct string
+        self.assertRaises(VersionError, convert.parse_many, ["1.2.3", "junk"])
+        self.assertRaises(VersionError, convert.parse_many, ["70000.0.0"], packed=True)
+
+    def test_many_unpackable_and_invalid(self):
+        big = convert.parse_many(["70000.0.0", "1.2.3", "70000.0.0"])
+        self.assertEqual(big, [Version(70000, 0, 0, ""), Version(1, 2, 3, ""), Version(70000, 0, 0, "")])
+        self.assertIs(big[0], big[2])
+        self.assertEqual(convert.render_many([big[0], Version(1, 0, 0, "beta", 20000)], "pep440"),
+                         ["70000.0.0", "1.0.0b20000"])
+        self.assertRaises(VersionError, convert.render_many, [3 << 14])  # tag index 3 is not a tag
+        self.assertRaises(VersionError, Version.unpack, -1)
+
+    def test_format_option(self):
+        with redirect_stderr(StringIO()):
+            self.assertRaises(SystemExit, main, ["--format", "pep440", "--bump", "patch", "VERSION"])
+            self.assertRaises(SystemExit, main, ["--format", "pep440", "--getversion", "--ndjson", "VERSION"])
+
+
+if __name__ == "__main__":
+    unittest.main()
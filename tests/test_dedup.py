@@ -0,0 +1,68 @@
+import unittest
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from semvermanager import Version, VersionError, GetVersionQuery
+from semvermanager.command import OperationRunner
+from semvermanager.dedup import ContentCache
+from semvermanager.metrics import Metrics
+
+
+class TestContentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.files = []
+        for i in range(5):
+            filename = os.path.join(self.root, f"VERSION{i}")
+            Version(1, 2, 3, "beta", 4).write(filename)
+            self.files.append(filename)
+        self.other = os.path.join(self.root, "setup.py")
+        with open(self.other, "w") as file:
+            file.write("NAME = 'x'\nVERSION = '2.0.0'\nVERSION = '2.0.0'\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_find(self):
+        cache = ContentCache()
+        versions = [cache.find(f) for f in self.files + [self.other]]
+        self.assertEqual(versions[:5], [Version(1, 2, 3, "beta", 4)] * 5)
+        self.assertEqual(versions[5], Version(2, 0, 0, ""))
+        self.assertEqual((cache.hits, cache.misses), (4, 2))
+        versions[0].bump_major()  # results are independent copies
+        self.assertEqual(cache.find(self.files[1]), Version(1, 2, 3, "beta", 4))
+        self.assertEqual(len(cache.groups(self.files + [self.other])), 2)
+
+        with open(self.files[0], "w") as file:
+            file.write("VERSION = junk\n")
+        self.assertRaises(VersionError, cache.find, self.files[0])
+
+    def test_shared_between_threads(self):
+        cache = ContentCache()
+        files = (self.files + [self.other]) * 40
+        with ThreadPoolExecutor(8) as pool:
+            versions = list(pool.map(cache.find, files))
+        self.assertEqual(versions, [cache.find(f) for f in files])
+        self.assertEqual(cache.hits + cache.misses, len(files) + len(files))
+
+    def test_runner_metrics(self):
+        metrics = Metrics()
+        runner = OperationRunner(GetVersionQuery(dedup=ContentCache()), metrics)
+        self.assertEqual(len(list(runner.results(self.files))), 5)
+        self.assertEqual(metrics.histogram("parse").count, 1)
+        self.assertEqual(metrics.histogram("open").count, 5)
+
+    def test_update_lines(self):
+        cache = ContentCache()
+        self.assertEqual(cache.update_lines(self.other), [2, 3])
+        self.assertEqual(Version.update(self.other, Version(3, 0, 0, ""), dry_run=True), (self.other, [2, 3]))
+        self.assertEqual(Version.find(self.other), Version(2, 0, 0, ""))
+        self.assertEqual([cache.update_lines(f) for f in self.files], [[1]] * 5)
+        self.assertEqual(cache.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+from semvermanager import Version, BumpCommand, UpdateCommand, GetVersionQuery
+from semvermanager import extractors
+from semvermanager.command import OperationRunner
+from semvermanager.extractors import extractor_for, register, Extractor, REGISTRY, _instances
+from semvermanager.journal import BumpJournal
+from semvermanager.metrics import Metrics
+
+
+PYPROJECT = """[build-system]
+version = "0.0.0"
+
+[project]
+name = "x"
+version = "1.2.3"  # the version
+"""
+
+CARGO = """[package]
+name = "x"
+version = '0.4.0-beta2'
+
+[dependencies]
+serde = { version = "1.0" }
+"""
+
+PACKAGE_JSON = """{
+  "name": "x",
+  "dependencies": {"version": "9.9.9"},
+  "version": "2.0.0",
+  "scripts": {}
+}
+"""
+
+SETUP_CFG = """[metadata]
+name = x
+version = 3.1.4
+
+[options]
+"""
+
+
+class TestExtractors(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        filename = os.path.join(self.dir, name)
+        with open(filename, "w") as file:
+            file.write(text)
+        return filename
+
+    def test_lazy_loading(self):
+        _instances.clear()
+        for m in [m for m in sys.modules if m.startswith("semvermanager.extractors.")]:
+            del sys.modules[m]
+        self.assertIsNone(extractor_for("VERSION"))
+        self.assertNotIn("semvermanager.extractors.npm", sys.modules)
+        extractor_for("a/package.json")
+        self.assertIn("semvermanager.extractors.npm", sys.modules)
+        self.assertNotIn("semvermanager.extractors.toml", sys.modules)
+
+    def test_plugins_loaded_last(self):
+        with mock.patch.object(extractors, "_plugins_loaded", False), \
+                mock.patch.object(extractors, "_load_plugins") as load:
+            for name in ["VERSION", "setup.py", "conf.py", "_version.py", "package.json"]:
+                extractor_for("a/" + name)
+            load.assert_not_called()
+            extractor_for("a/version.unknown")
+            load.assert_called_once()
+
+    def test_find(self):
+        cases = [("pyproject.toml", PYPROJECT, Version(1, 2, 3, "")),
+                 ("Cargo.toml", CARGO, Version(0, 4, 0, "beta", 2)),
+                 ("package.json", PACKAGE_JSON, Version(2, 0, 0, "")),
+                 ("setup.cfg", SETUP_CFG, Version(3, 1, 4, ""))]
+        for name, text, expected in cases:
+            filename = self.write(name, text)
+            self.assertEqual(extractor_for(filename).find(filename), expected, name)
+
+    def test_bump_through_runner(self):
+        filename = self.write("package.json", PACKAGE_JSON)
+        runner = OperationRunner(BumpCommand())
+        (f, v), = runner.results([filename], "VERSION", "=", "minor")
+        self.assertEqual(v, Version(2, 1, 0, ""))
+        with open(filename) as file:
+            self.assertEqual(file.read(), PACKAGE_JSON.replace('"2.0.0"', '"2.1.0"'))
+
+        filename = self.write("pyproject.toml", PYPROJECT)
+        list(runner.results([filename], "VERSION", "=", "patch"))
+        with open(filename) as file:
+            self.assertEqual(file.read(), PYPROJECT.replace('"1.2.3"', '"1.2.4"'))
+
+        (f, v), = OperationRunner(GetVersionQuery()).results([filename])
+        self.assertEqual(v, Version(1, 2, 4, ""))
+
+    def test_update_journal_and_metrics(self):
+        filename = self.write("package.json", PACKAGE_JSON)
+        journal = BumpJournal(os.path.join(self.dir, "journal"))
+        metrics = Metrics()
+        runner = OperationRunner(UpdateCommand(journal), metrics)
+        list(runner.results([filename], Version(2, 5, 0, ""), "VERSION", "="))
+        entry, = journal.bumps(filename)
+        self.assertEqual((entry.old, entry.new), (Version(2, 0, 0, ""), Version(2, 5, 0, "")))
+        self.assertEqual(metrics.histogram("write").count, 1)
+        self.assertEqual(metrics.counter("lines_matched"), 1)
+        journal.close()
+
+    def test_register(self):
+        class Upper(Extractor):
+            def locate(self, text):
+                start = text.index("V:") + 2
+                return start, text.index("\n", start)
+
+        register("*.upper", Upper)
+        try:
+            filename = self.write("x.upper", "V:5.0.0\n")
+            self.assertEqual(extractor_for(filename).find(filename), Version(5, 0, 0, ""))
+        finally:
+            del REGISTRY["*.upper"]
+            _instances.pop("*.upper", None)
+
+
+if __name__ == '__main__':
+    unittest.main()
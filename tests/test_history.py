@@ -0,0 +1,95 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from semvermanager import Version, main, manifest
+from semvermanager.history import version_history, version_changes, find_in_blob, CatFile, changed_files
+
+
+def git(cwd, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+        self.filename = os.path.join(self.repo, "setup.py")
+        git(self.repo, "init", "-q")
+        for i, (v, tag) in enumerate([("0.1.0", "v0.1.0"), ("0.1.0", None), ("0.2.0-beta1", None),
+                                      ("0.2.0", "v0.2.0")]):
+            with open(self.filename, "w") as file:
+                file.write(f"NAME = 'x'\nVERSION = '{v}'\n# commit {i}\n")
+            git(self.repo, "add", "setup.py")
+            git(self.repo, "commit", "-q", "-m", f"commit {i}")
+            if tag:
+                git(self.repo, "tag", tag)
+
+    def tearDown(self):
+        shutil.rmtree(self.repo)
+
+    def test_find_in_blob(self):
+        self.assertEqual(find_in_blob(b"a = 1\nVERSION = '1.2.3'\n"), Version(1, 2, 3, ""))
+        self.assertIsNone(find_in_blob(b"a = 1\n"))
+        self.assertIsNone(find_in_blob(b"VERSION = junk\n"))
+
+    def test_cat_file_missing(self):
+        results = list(CatFile(self.repo, check=True).stream(["HEAD:./setup.py", "HEAD:./nothere"]))
+        self.assertEqual(results[0][2], "blob")
+        self.assertEqual(results[1][1:], (None, None, None))
+
+    def test_history(self):
+        history = list(version_history(self.filename))
+        self.assertEqual(len(history), 4)
+        self.assertEqual([v for _, v in history],
+                         [Version(0, 1, 0, ""), Version(0, 1, 0, ""), Version(0, 2, 0, "beta", 1),
+                          Version(0, 2, 0, "")])
+
+        changes = [v for _, v in version_changes(self.filename)]
+        self.assertEqual(changes, [Version(0, 1, 0, ""), Version(0, 2, 0, "beta", 1), Version(0, 2, 0, "")])
+
+        tags = list(version_history(self.filename, tags=True))
+        self.assertEqual(tags, [("v0.1.0", Version(0, 1, 0, "")), ("v0.2.0", Version(0, 2, 0, ""))])
+
+    def test_changed_files(self):
+        self.assertEqual(changed_files("HEAD", cwd=self.repo), set())
+        os.mkdir(os.path.join(self.repo, "pkg"))
+        other = os.path.join(self.repo, "pkg", "VERSION")
+        Version(3, 0, 0, "").write(other)
+        git(self.repo, "add", "pkg/VERSION")
+        self.assertEqual(changed_files(staged=True, cwd=self.repo), {"pkg/VERSION"})
+        self.assertEqual(changed_files("HEAD~1", cwd=self.repo), {"setup.py", "pkg/VERSION"})
+        self.assertEqual(changed_files("HEAD~1", cwd=os.path.join(self.repo, "pkg")), {"VERSION"})
+
+    def test_changed_since_reuses_index(self):
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            os.mkdir("pkg")
+            Version(3, 0, 0, "").write("pkg/VERSION")
+            git(self.repo, "add", "pkg/VERSION")
+            git(self.repo, "commit", "-q", "-m", "pkg")
+            manifest.snapshot(".", "index.manifest")
+            with open("setup.py", "a") as file:
+                file.write("# edited\n")
+            out = StringIO()
+            with redirect_stdout(out):
+                main(["--getversion", "--bareversion", "--changed-since", "HEAD", "--index", "index.manifest"])
+            self.assertEqual(out.getvalue(), "Version in setup.py is 0.2.0\nVersion in pkg/VERSION is 3.0.0\n")
+
+            out = StringIO()
+            with redirect_stdout(out):
+                main(["--getversion", "--bareversion", "--staged", "setup.py"])
+            self.assertEqual(out.getvalue(), "")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import os
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import temp
+
+from semvermanager import Version, BumpCommand, main
+from semvermanager.command import OperationRunner
+from semvermanager.journal import BumpJournal
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = temp.tempfile()
+        self.journal_file = temp.tempfile()
+        Version(1, 9, 0, "").write(self.filename)
+
+    def tearDown(self):
+        for f in [self.filename, self.filename + ".old", self.journal_file,
+                  self.journal_file + ".names", self.journal_file + ".index"]:
+            if os.path.isfile(f):
+                os.unlink(f)
+
+    def test_record_and_query(self):
+        with BumpJournal(self.journal_file) as journal:
+            journal.record("a", "VERSION", Version(1, 0, 0, ""), Version(1, 1, 0, ""), timestamp=1.0)
+            journal.record("b", "release", Version(1, 9, 0, ""), Version(2, 0, 0, ""), timestamp=2.0)
+            journal.record("a", "VERSION", Version(1, 1, 0, ""), Version(2, 0, 0, "alpha"), timestamp=3.0)
+            self.assertEqual(os.path.getsize(self.journal_file), 3 * BumpJournal.RECORD.size)
+
+            self.assertEqual(len(list(journal.entries())), 3)
+            bumps = journal.bumps("a")
+            self.assertEqual([e.timestamp for e in bumps], [1.0, 3.0])
+            self.assertEqual(bumps[0].filename, os.path.abspath("a"))
+
+            crossed = journal.crossed(Version(2, 0, 0, ""))
+            self.assertEqual(crossed.timestamp, 2.0)
+            self.assertEqual(crossed.lhs, "release")
+            self.assertEqual(journal.crossed(Version(2, 0, 0, "alpha"), "a").timestamp, 3.0)
+            self.assertIsNone(journal.crossed(Version(3, 0, 0, "")))
+
+            # the index picks up records added after the first query
+            journal.record("a", "VERSION", Version(2, 0, 0, "alpha"), Version(2, 0, 0, "beta"))
+            self.assertEqual(len(journal.bumps("a")), 3)
+
+    def test_bump_command_records(self):
+        with BumpJournal(self.journal_file) as journal:
+            runner = OperationRunner(BumpCommand(journal))
+            list(runner.results([self.filename], "VERSION", "=", "minor"))
+            entry, = journal.bumps(self.filename)
+            self.assertEqual(entry.old, Version(1, 9, 0, ""))
+            self.assertEqual(entry.new, Version(1, 10, 0, ""))
+
+        main(["--journal", self.journal_file, "--bump", "major", self.filename])
+        self.assertEqual(len(BumpJournal(self.journal_file).bumps(self.filename)), 2)
+
+    def test_index_persisted(self):
+        with BumpJournal(self.journal_file) as journal:
+            journal.record("a", "VERSION", Version(1, 0, 0, ""), Version(1, 1, 0, ""))
+            journal.record("b", "VERSION", Version(1, 0, 0, ""), Version(1, 1, 0, ""))
+            self.assertEqual(len(journal.bumps("a")), 1)
+        self.assertEqual(os.path.getsize(self.journal_file + ".index"), 2 * BumpJournal.INDEX.size)
+
+        with BumpJournal(self.journal_file) as journal:
+            journal.record("a", "VERSION", Version(1, 1, 0, ""), Version(1, 2, 0, ""))
+            self.assertEqual(len(journal.bumps("a")), 2)
+            self.assertEqual(len(journal.bumps("b")), 1)
+        self.assertEqual(os.path.getsize(self.journal_file + ".index"), 3 * BumpJournal.INDEX.size)
+
+    def test_large_version_recorded(self):
+        Version(1, 0, 0, "beta", 0x3FFF).write(self.filename)
+        with BumpJournal(self.journal_file) as journal:
+            Version.bump_file(self.filename, "tag_version", journal=journal)
+            Version.update(self.filename, Version(1, 0x10000, 0, ""), journal=journal)
+            Version.update(self.filename, Version(1, 1 << 40, 0, ""), journal=journal)
+            first, second, third = journal.bumps(self.filename)
+            self.assertEqual(first.new, Version(1, 0, 0, "beta", 0x4000))
+            self.assertEqual(second.new, Version(1, 0x10000, 0, ""))
+            self.assertEqual(third.new, Version(1, 0xFFFFFFFF, 0, ""))  # saturated
+            self.assertEqual(journal.crossed(Version(1, 0x10000, 0, "")).timestamp, second.timestamp)
+        self.assertEqual(Version.find(self.filename), Version(1, 1 << 40, 0, ""))
+
+        with mock.patch.dict(os.environ, {"SEMVERMGR_JOURNAL": self.journal_file}), redirect_stdout(StringIO()):
+            Version(1, 0, 0, "beta", 16383).write(self.filename)
+            main(["--bump", "tag_version", self.filename])
+        self.assertEqual(Version.find(self.filename), Version(1, 0, 0, "beta", 16384))
+
+    def test_show_journal_needs_journal(self):
+        with mock.patch.dict(os.environ, {"SEMVERMGR_JOURNAL": ""}), redirect_stderr(StringIO()):
+            self.assertRaises(SystemExit, main, ["--show-journal"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+
+import temp
+
+from semvermanager import Version, VersionError, LazyVersion
+
+
+class TestLazyVersion(unittest.TestCase):
+
+    def test_lazy_parse(self):
+        lv = LazyVersion("VERSION = '1.2.3-beta4'")
+        self.assertIsNone(lv._version)
+        self.assertEqual(lv.value, "1.2.3-beta4")
+        self.assertIsNone(lv._version)
+        self.assertEqual(lv.minor, 2)
+        self.assertEqual(lv.tag, "beta")
+        self.assertIsNotNone(lv._version)
+        self.assertEqual(lv, Version(1, 2, 3, "beta", 4))
+        self.assertEqual(Version(1, 2, 3, "beta", 4), lv)
+
+    def test_invalid(self):
+        lv = LazyVersion("VERSION = 'junk'")
+        self.assertEqual(lv.value, "junk")
+        self.assertFalse(lv.valid)
+        self.assertRaises(VersionError, lambda: lv.major)
+        self.assertIsNotNone(lv._error)  # the failure is cached, not reparsed
+        # invalid text still hashes and compares, by its text
+        self.assertEqual(len({lv, LazyVersion("VERSION='junk'"), LazyVersion("VERSION = '1.0.0'")}), 2)
+
+    def test_ordering_and_dedupe(self):
+        a = LazyVersion("VERSION = '1.0.0-alpha'")
+        b = LazyVersion("VERSION='1.0.0-alpha0'")
+        c = LazyVersion("VERSION = '1.0.0'")
+        self.assertEqual(a, b)
+        self.assertEqual(len({a, b, c}), 2)
+        self.assertTrue(all(lv._version is None for lv in (a, b, c)))  # no parse to compare or hash
+        self.assertEqual(sorted([c, a]), [a, c])
+        self.assertLess(a, Version(1, 0, 0, "beta"))
+
+    def test_promote(self):
+        lv = LazyVersion("release: '0.9.0'", lhs="release", separator=":")
+        v = lv.promote()
+        v.bump_major()
+        self.assertEqual(str(v), "release : '1.0.0'")
+        self.assertEqual(lv.bare_version, "0.9.0")
+
+    def test_scan(self):
+        filename = temp.tempfile()
+        try:
+            with open(filename, "w") as file:
+                file.write("# header\n  VERSION = '0.1.0'\nVERSION = '0.2.0-alpha1'\n")
+            found = list(LazyVersion.scan(filename))
+            self.assertEqual([lv.raw for lv in found], ["VERSION = '0.1.0'", "VERSION = '0.2.0-alpha1'"])
+            self.assertEqual([lv.offset for lv in found], [11, 29])
+            with open(filename, "rb") as file:
+                data = file.read()
+            for lv in found:
+                self.assertEqual(data[lv.offset:lv.offset + len(lv.raw)].decode(), lv.raw)
+            self.assertTrue(all(lv._version is None for lv in found))
+        finally:
+            os.unlink(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
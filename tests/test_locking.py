@@ -0,0 +1,64 @@
+import unittest
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import temp
+
+from semvermanager import Version, VersionConflictError
+from semvermanager.locking import FileLock, LockTimeout, temp_file, fcntl
+
+
+class TestLocking(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = temp.tempfile()
+        Version(0, 1, 0, "").write(self.filename)
+
+    def tearDown(self):
+        for f in [self.filename, self.filename + ".old"]:
+            if os.path.isfile(f):
+                os.unlink(f)
+
+    def test_temp_file(self):
+        os.chmod(self.filename, 0o640)
+        f1, n1 = temp_file(self.filename)
+        f2, n2 = temp_file(self.filename)
+        try:
+            self.assertNotEqual(n1, n2)
+            self.assertEqual(os.path.dirname(n1), os.path.dirname(self.filename))
+            self.assertEqual(os.stat(n1).st_mode & 0o777, 0o640)
+        finally:
+            for f, n in [(f1, n1), (f2, n2)]:
+                f.close()
+                os.unlink(n)
+
+    @unittest.skipIf(fcntl is None, "no fcntl on this platform")
+    def test_lock_timeout(self):
+        with FileLock(self.filename):
+            other = FileLock(self.filename, timeout=0.05)
+            self.assertRaises(LockTimeout, other.acquire)
+        with FileLock(self.filename, timeout=0.05) as lock:
+            self.assertTrue(lock.locked)
+
+    def test_compare_and_swap(self):
+        v, _ = Version.bump_file(self.filename, "patch", expected=Version(0, 1, 0, ""))
+        self.assertEqual(v, Version(0, 1, 1, ""))
+        self.assertRaises(VersionConflictError, Version.bump_file, self.filename, "patch",
+                          expected=Version(0, 1, 0, ""))
+        self.assertEqual(Version.find(self.filename), Version(0, 1, 1, ""))
+
+    def test_concurrent_bumps(self):
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: Version.bump_file(self.filename, "patch"), range(50)))
+        self.assertEqual(Version.find(self.filename), Version(0, 1, 50, ""))
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: Version.compare_and_bump(self.filename, "patch", retries=1000), range(20)))
+        self.assertEqual(Version.find(self.filename), Version(0, 1, 70, ""))
+        leftovers = [f for f in os.listdir(os.path.dirname(self.filename)) if f.endswith(".temp")
+                     and os.path.basename(self.filename) in f]
+        self.assertEqual(leftovers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
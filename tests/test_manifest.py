@@ -0,0 +1,71 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from semvermanager import Version
+from semvermanager import manifest
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("a/VERSION", "VERSION = '1.0.0'\n")
+        self.write("a.py/VERSION", "VERSION = '1.1.0'\n")  # directory named like a file
+        self.write("b/setup.py", "NAME = 'b'\nVERSION = '2.0.0-beta1'\nVERSION = junk\nVERSION = '2.0.0'\n")
+        self.write("b/README", "VERSION = '9.9.9'\n")  # not a version file pattern
+        self.write(".git/VERSION", "VERSION = '9.9.9'\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        filename = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "w") as file:
+            file.write(text)
+
+    def test_discover_order(self):
+        paths = list(manifest.discover(self.root))
+        self.assertEqual(paths, ["a/VERSION", "a.py/VERSION", "b/setup.py"])
+        self.assertEqual(paths, sorted(paths, key=manifest.sort_key))
+
+    def test_snapshot_and_read(self):
+        filename = os.path.join(self.root, "m1")
+        self.assertEqual(manifest.snapshot(self.root, filename), 4)
+        entries = list(manifest.read(filename))
+        self.assertEqual([(e.path, e.line) for e in entries],
+                         [("a/VERSION", 1), ("a.py/VERSION", 1), ("b/setup.py", 2), ("b/setup.py", 4)])
+        self.assertEqual(Version.unpack(entries[2].key), Version(2, 0, 0, "beta", 1))
+
+    def test_diff(self):
+        old = os.path.join(self.root, "old")
+        new = os.path.join(self.root, "new")
+        manifest.snapshot(self.root, old)
+        os.unlink(os.path.join(self.root, "a", "VERSION"))
+        self.write("b/setup.py", "\n\nVERSION = '2.0.0-beta2'\nVERSION = '2.0.0'\n")  # lines moved too
+        self.write("c/VERSION", "VERSION = '3.0.0'\n")
+        manifest.snapshot(self.root, new)
+
+        changes = list(manifest.diff(old, new))
+        self.assertEqual([(c.kind, c.path) for c in changes],
+                         [("removed", "a/VERSION"), ("changed", "b/setup.py"), ("added", "c/VERSION")])
+        self.assertEqual(changes[1].old, Version(2, 0, 0, "beta", 1))
+        self.assertEqual(changes[1].new, Version(2, 0, 0, "beta", 2))
+        self.assertEqual(list(manifest.diff(new, new)), [])
+
+    def test_unpackable_version(self):
+        self.write("a/VERSION", "VERSION = '1.70000.0'\n")
+        filename = os.path.join(self.root, "m1")
+        self.assertEqual(manifest.snapshot(self.root, filename), 4)
+        self.assertEqual(manifest.index(filename)["a/VERSION"], Version(1, 70000, 0, ""))
+        self.assertEqual(manifest.index(filename)["a.py/VERSION"], Version(1, 1, 0, ""))
+
+    def test_not_a_manifest(self):
+        filename = os.path.join(self.root, "b", "README")
+        self.assertRaises(manifest.ManifestError, list, manifest.read(filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import json
+
+import temp
+
+from semvermanager import Version, BumpCommand
+from semvermanager.command import OperationRunner
+from semvermanager.metrics import Metrics, NULL_METRICS, MemorySink, JSONSink, PrometheusSink, make_sink, \
+    Histogram
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        h = Histogram(buckets=(1.0, 2.0))
+        h.observe(0.5)
+        h.observe(1.5)
+        h.observe(10.0)
+        self.assertEqual(h.count, 3)
+        self.assertEqual(h.cumulative(), [(1.0, 1), (2.0, 2), (float("inf"), 3)])
+
+    def test_null_metrics(self):
+        with NULL_METRICS.timer("open"):
+            NULL_METRICS.incr("files")
+        self.assertEqual(NULL_METRICS.snapshot(), {"counters": {}, "timers": {}})
+
+    def test_runner_metrics(self):
+        sink = MemorySink()
+        metrics = Metrics(sink)
+        temp_filename = temp.tempfile()
+        try:
+            Version(0, 1, 0, "").write(temp_filename)
+            runner = OperationRunner(BumpCommand(), metrics)
+            for cmd in runner([temp_filename], "VERSION", "=", "patch"):
+                for filename, v in cmd.items():
+                    self.assertEqual(v, Version(0, 1, 1, ""))
+            metrics.flush()
+            counters = sink.snapshot["counters"]
+            self.assertEqual(counters["files"], 1)
+            self.assertEqual(counters["lines_matched"], 1)
+            self.assertEqual(counters["lines_scanned"], 1)
+            self.assertEqual(counters["results"], 1)
+            for phase in ["open", "parse", "write", "rename", "dispatch"]:
+                self.assertIn(phase, sink.snapshot["timers"])
+        finally:
+            for f in [temp_filename, temp_filename + ".old"]:
+                if os.path.isfile(f):
+                    os.unlink(f)
+
+    def test_sinks(self):
+        self.assertIsInstance(make_sink("x.prom"), PrometheusSink)
+        self.assertIsInstance(make_sink("x.json"), JSONSink)
+        temp_filename = temp.tempfile()
+        try:
+            metrics = Metrics(make_sink(temp_filename, "json"))
+            metrics.incr("files", 3)
+            metrics.observe("parse", 0.002)
+            metrics.flush()
+            with open(temp_filename) as file:
+                data = json.load(file)
+            self.assertEqual(data["counters"]["files"], 3)
+            self.assertEqual(data["timers"]["parse"]["count"], 1)
+
+            metrics = Metrics(make_sink(temp_filename, "prometheus"))
+            metrics.incr("files")
+            metrics.flush()
+            with open(temp_filename) as file:
+                self.assertIn("semvermanager_files_total 1", file.read())
+        finally:
+            if os.path.isfile(temp_filename):
+                os.unlink(temp_filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import threading
+from unittest import mock
+
+import temp
+
+import semvermanager
+from semvermanager import Version, VersionError
+from semvermanager import runtime
+
+
+class TestCurrent(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = temp.tempfile()
+        Version(1, 0, 0, "").write(self.filename)
+
+    def tearDown(self):
+        runtime.forget()
+        if os.path.isfile(self.filename):
+            os.unlink(self.filename)
+
+    def test_cached_and_revalidated(self):
+        self.assertIs(semvermanager.current, runtime.current)
+        v = semvermanager.current(self.filename)
+        self.assertEqual(v, Version(1, 0, 0, ""))
+        self.assertIs(semvermanager.current(self.filename), v)
+
+        Version(1, 0, 1, "").write(self.filename + ".new")
+        os.replace(self.filename + ".new", self.filename)
+        self.assertIs(semvermanager.current(self.filename, interval=60), v)
+        self.assertIs(semvermanager.current(self.filename, frozen=True, interval=0), v)
+        self.assertEqual(semvermanager.current(self.filename, interval=0), Version(1, 0, 1, ""))
+
+    def test_bad_refresh_keeps_last_good(self):
+        semvermanager.current(self.filename)
+        with open(self.filename, "w") as file:
+            file.write("VERSION = junk and more junk\n")
+        self.assertEqual(semvermanager.current(self.filename, interval=0), Version(1, 0, 0, ""))
+        runtime.forget(self.filename)
+        self.assertRaises(VersionError, semvermanager.current, self.filename)
+
+    def test_threads(self):
+        results = []
+
+        def reader():
+            for _ in range(200):
+                results.append(semvermanager.current(self.filename, interval=0))
+
+        threads = [threading.Thread(target=reader) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(results), 1600)
+        self.assertTrue(all(v == Version(1, 0, 0, "") for v in results))
+
+    def test_first_load_does_not_block_other_files(self):
+        other = temp.tempfile()
+        Version(2, 0, 0, "").write(other)
+        started, release = threading.Event(), threading.Event()
+        read = runtime._read
+
+        def slow_read(path, label, separator):
+            if path == self.filename:
+                started.set()
+                release.wait(5)
+            return read(path, label, separator)
+
+        try:
+            with mock.patch.object(runtime, "_read", slow_read):
+                slow = threading.Thread(target=semvermanager.current, args=(self.filename,))
+                slow.start()
+                self.assertTrue(started.wait(5))
+                self.assertEqual(semvermanager.current(other), Version(2, 0, 0, ""))
+                self.assertFalse(release.is_set())  # served while the first load was still in progress
+                release.set()
+                slow.join()
+            self.assertEqual(semvermanager.current(self.filename), Version(1, 0, 0, ""))
+        finally:
+            os.unlink(other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import os
+
+import temp
+
+from semvermanager import Version, VersionError, SemVer, GetVersionQuery
+from semvermanager.command import OperationRunner
+
+
+class TestSemVer(unittest.TestCase):
+
+    def test_parse(self):
+        v = SemVer.parse("1.2.3-rc.1+build.5")
+        self.assertEqual((v.major, v.minor, v.patch), (1, 2, 3))
+        self.assertEqual(v.prerelease, ("rc", "1"))
+        self.assertEqual(v.build, ("build", "5"))
+        self.assertEqual(str(v), "1.2.3-rc.1+build.5")
+
+        self.assertEqual(SemVer.parse("'0.1.0-alpha2'").prerelease, ("alpha2",))
+        self.assertEqual(SemVer.parse("1.0.0+20130313144700").build, ("20130313144700",))
+        for bad in ["1.2", "01.2.3", "1.2.3-", "1.2.3-01", "1.2.3+", "1.2.3-a..b", "x.y.z"]:
+            self.assertRaises(VersionError, SemVer.parse, bad)
+
+    def test_precedence(self):
+        # the example ordering from semver.org section 11
+        ordered = ["1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta", "1.0.0-beta.2",
+                   "1.0.0-beta.11", "1.0.0-rc.1", "1.0.0", "2.0.0", "2.1.0", "2.1.1"]
+        versions = [SemVer.parse(s) for s in ordered]
+        self.assertEqual(sorted(reversed(versions)), versions)
+        self.assertEqual(SemVer.parse("1.0.0+a"), SemVer.parse("1.0.0+b"))
+
+    def test_version_conversion(self):
+        for v in [Version(1, 2, 3, ""), Version(1, 2, 3, "alpha", 4), Version(0, 0, 1, "beta")]:
+            self.assertEqual(SemVer.from_version(v).to_version(), v)
+        self.assertRaises(VersionError, SemVer.parse("1.2.3-rc.1").to_version)
+        self.assertRaises(VersionError, SemVer.parse("1.2.3+b").to_version)
+
+    def test_getversion_fallback(self):
+        filename = temp.tempfile()
+        try:
+            with open(filename, "w") as file:
+                file.write("VERSION = '1.2.3-rc.1+build.5'\n")
+            (f, v), = OperationRunner(GetVersionQuery()).results([filename])
+            self.assertEqual(v, SemVer(1, 2, 3, ("rc", "1")))
+        finally:
+            os.unlink(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import os
 from contextlib import contextmanager
 from io import StringIO
+import subprocess
 import sys
 
 import temp
@@ -112,6 +113,64 @@ class TestVersionManager(unittest.TestCase):
         self.assertEqual(v.minor, 0)
         self.assertEqual(v.major, 2)
 
+    def test_rendering_cache(self):
+        v = Version(0, 1, 2, "alpha", 1)
+        self.assertIs(str(v), str(v))
+        self.assertIs(v.bare_version, v.bare_version)
+        self.assertEqual(str(v), "VERSION = '0.1.2-alpha1'")
+
+        for mutate, expected in [(lambda: v.bump("tag_version"), "0.1.2-alpha2"),
+                                 (lambda: v.bump("tag"), "0.1.2-beta2"),
+                                 (lambda: v.bump("patch"), "0.1.3-beta2"),
+                                 (lambda: v.bump("minor"), "0.2.0-beta2"),
+                                 (lambda: v.bump("major"), "1.0.0-beta2"),
+                                 (lambda: setattr(v, "patch", 7), "1.0.7-beta2"),
+                                 (lambda: setattr(v, "minor", 3), "1.3.7-beta2"),
+                                 (lambda: setattr(v, "major", 4), "4.3.7-beta2"),
+                                 (lambda: setattr(v, "tag_version", 9), "4.3.7-beta9"),
+                                 (lambda: setattr(v, "tag", "alpha"), "4.3.7-alpha9"),
+                                 (lambda: v.bump("tag"), "4.3.7-beta9"),
+                                 (lambda: v.bump("tag"), "4.3.7")]:
+            mutate()
+            self.assertEqual(v.bare_version, expected)
+            self.assertEqual(str(v), f"VERSION = '{expected}'")
+            self.assertIn(f"{v.major}, {v.minor}, {v.patch}", repr(v))
+
+    def test_pack(self):
+        versions = [Version(0, 0, 1, "alpha"), Version(0, 0, 1, "alpha", 2), Version(0, 0, 1, "beta"),
+                    Version(0, 0, 1, ""), Version(0, 1, 0, "alpha"), Version(2, 0, 0, "")]
+        keys = [v.pack() for v in versions]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual([Version.unpack(k) for k in keys], versions)
+        self.assertRaises(VersionError, Version(70000, 0, 0, "").pack)
+
+        v = Version(1, 0, 0, "alpha")
+        v.tag = "beta"
+        self.assertEqual(Version.unpack(v.pack()), Version(1, 0, 0, "beta"))
+
+    def test_bytes(self):
+        versions = [Version(0, 0, 1, "alpha"), Version(0, 0, 1, "beta", 3), Version(1, 0, 0, ""),
+                    Version(65535, 2, 3, "")]
+        encoded = [v.to_bytes() for v in versions]
+        self.assertTrue(all(len(b) == 8 for b in encoded))
+        self.assertEqual(encoded, sorted(encoded))
+        self.assertEqual([Version.from_bytes(b) for b in encoded], versions)
+
+        data = Version.pack_many(versions)
+        self.assertEqual(data, b"".join(encoded))
+        self.assertEqual(Version.unpack_many(data), versions)
+        self.assertEqual(Version.unpack_many(b""), [])
+
+    def test_pickle(self):
+        import pickle
+        for v in [Version(1, 2, 3, "beta", 4), Version(0, 1, 0, "", lhs="release", separator=":"),
+                  Version(100000, 0, 0, "")]:
+            x = pickle.loads(pickle.dumps(v))
+            self.assertEqual(x, v)
+            self.assertEqual(str(x), str(v))
+        many = [Version(1, i, 0, "") for i in range(1000)]
+        self.assertLess(len(pickle.dumps(many)), 16 * len(many))
+
     def test_file_write(self):
 
         temp_filename = temp.tempfile()
@@ -172,6 +231,27 @@ class TestVersionManager(unittest.TestCase):
             if os.path.isfile(temp_filename):
                 os.unlink(temp_filename)
 
+    def test_bump_file(self):
+
+        temp_filename = temp.tempfile()
+        try:
+            with open(temp_filename, "w") as file:
+                file.write("# header\nVERSION = '0.4.2-beta1'\nother = 1\nVERSION = '0.4.2-beta1'\nVERSION = junk\n")
+            v, lines = Version.bump_file(temp_filename, "minor")
+            self.assertEqual(v, Version(0, 5, 0, "beta", 1))
+            self.assertEqual(lines, [2, 4])
+            with open(temp_filename) as file:
+                self.assertEqual(file.read(), "# header\nVERSION = '0.5.0-beta1'\nother = 1\n"
+                                              "VERSION = '0.5.0-beta1'\nVERSION = junk\n")
+
+            with open(temp_filename, "w") as file:
+                file.write("nothing here\n")
+            self.assertRaises(VersionError, Version.bump_file, temp_filename, "patch")
+        finally:
+            for f in [temp_filename, temp_filename + ".old"]:
+                if os.path.isfile(f):
+                    os.unlink(f)
+
     def test_parse_version(self):
 
         v = Version.parse_version("0.0.0-alpha")
@@ -221,6 +301,18 @@ URL = 'https://github.com/jdrumgoole/semvermanager'
         finally:
             os.unlink("test_data")
 
+    def test_lazy_exports(self):
+        code = ("import sys, semvermanager\n"
+                "print(sorted(m for m in sys.modules if m.startswith('semvermanager.')))\n"
+                "print(semvermanager.BumpJournal.__module__, semvermanager.load_config.__module__)\n"
+                "print(all(hasattr(semvermanager, n) for n in semvermanager.__all__))\n")
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        loaded, modules, exported = out.splitlines()
+        self.assertNotIn("semvermanager.journal", loaded)
+        self.assertNotIn("semvermanager.config", loaded)
+        self.assertEqual(modules, "semvermanager.journal semvermanager.config")
+        self.assertEqual(exported, "True")
+
     def test_cli(self):
         try:
             with captured_output() as (out, err):
@@ -230,10 +322,9 @@ URL = 'https://github.com/jdrumgoole/semvermanager'
                 self.assertTrue(out.getvalue().startswith("Created version VERSION = '0.0.0-alpha0' in 'dummy1'"))
                 main(["--bump", "tag_version", "--overwrite", "dummy1"])
         finally:
-            if os.path.isfile("dummy1"):
-                os.unlink("dummy1")
-            if os.path.isfile("dummy2"):
-                os.unlink("dummy2")
+            for f in ["dummy1", "dummy1.old", "dummy2"]:
+                if os.path.isfile(f):
+                    os.unlink(f)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,94 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from semvermanager import Version, main
+from semvermanager import manifest, shard
+from semvermanager.consistency import ConsistencyResult, INCONSISTENT
+
+
+class TestShard(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.files = []
+        for i in range(12):
+            filename = os.path.join(self.root, f"p{i}", "VERSION")
+            os.makedirs(os.path.dirname(filename))
+            Version(1, 0, i % 2, "").write(filename)
+            self.files.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def run_main(self, *args):
+        out = StringIO()
+        with redirect_stdout(out):
+            try:
+                main(list(args))
+                code = 0
+            except SystemExit as e:
+                code = e.code
+        return code, out.getvalue()
+
+    def test_parse_shard(self):
+        self.assertEqual(shard.parse_shard("2/4"), (2, 4))
+        for bad in ("0/4", "5/4", "x/4", "4"):
+            self.assertRaises(shard.ShardError, shard.parse_shard, bad)
+
+    def test_partition(self):
+        parts = [list(shard.select(self.files, i, 3)) for i in (1, 2, 3)]
+        self.assertEqual(sorted(sum(parts, [])), sorted(self.files))
+        self.assertEqual(shard.shard_of("a/./b/VERSION", 7), shard.shard_of("a/b/VERSION", 7))
+
+    def test_partition_independent_of_checkout(self):
+        other = tempfile.mkdtemp()
+        try:
+            for f in self.files:
+                moved = os.path.join(other, os.path.relpath(f, self.root))
+                for total in (2, 3, 5):
+                    self.assertEqual(shard.shard_of(f, total, self.root), shard.shard_of(moved, total, other))
+            self.assertEqual(shard.relative(self.files[0], self.root), "p0/VERSION")
+        finally:
+            shutil.rmtree(other)
+
+    def test_getversion_merge_and_check(self):
+        outputs = []
+        for i in (1, 2):
+            code, text = self.run_main("--getversion", "--ndjson", "--shard", f"{i}/2", *self.files)
+            self.assertEqual(code, 0)
+            outputs.append(os.path.join(self.root, f"shard{i}.ndjson"))
+            with open(outputs[-1], "w") as file:
+                file.write(text)
+
+        code, text = self.run_main("--merge", *outputs)
+        records = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(len(records), len(self.files))
+        self.assertEqual(records, sorted(records, key=lambda r: manifest.sort_key(r["path"])))
+
+        code, text = self.run_main("--merge", *outputs, "--check-consistent")
+        self.assertEqual(code, INCONSISTENT)
+
+        result = ConsistencyResult.from_records([{"path": "a", "version": "1.0.0"},
+                                                 {"path": "b", "error": "missing"}])
+        self.assertEqual(list(result.errors), ["b"])
+
+    def test_snapshot_merge(self):
+        outputs = []
+        for i in (1, 2, 3):
+            outputs.append(os.path.join(self.root, f"shard{i}.manifest"))
+            self.run_main("--snapshot", outputs[-1], "--shard", f"{i}/3", self.root)
+        whole = os.path.join(self.root, "whole.manifest")
+        manifest.snapshot(self.root, whole)
+
+        code, text = self.run_main("--merge", *outputs)
+        with open(whole) as file:
+            self.assertEqual(text, file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from semvermanager import Version, main, command
+from semvermanager.sniff import FileFilter, BINARY, TOO_LARGE, EXTENSION
+
+
+class TestFileFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.text = self.write("VERSION", b"VERSION = '1.2.3'\n")
+        self.binary = self.write("blob", b"VERSION = '1.2.3'\n\0\xff\xfe")
+        self.latin1 = self.write("latin1", b"VERSION = '1.2.3'\n# caf\xe9 ok\n")
+        self.large = self.write("large", b"VERSION = '1.2.3'\n" + b"#" * 4096)
+        self.image = self.write("logo.PNG", b"VERSION = '1.2.3'\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, data):
+        filename = os.path.join(self.root, name)
+        with open(filename, "wb") as file:
+            file.write(data)
+        return filename
+
+    def test_reason(self):
+        f = FileFilter(max_size=1024)
+        self.assertIsNone(f.reason(self.text))
+        self.assertEqual(f.reason(self.binary), BINARY)
+        self.assertIsNone(f.reason(self.latin1))  # not UTF-8, but text
+        self.assertEqual(f.reason(self.large), TOO_LARGE)
+        self.assertEqual(f.reason(self.image), EXTENSION)
+        self.assertIsNone(f.reason(os.path.join(self.root, "missing")))
+        self.assertFalse(FileFilter.is_binary("é".encode()[:1]))  # cut short by the block size
+        self.assertFalse(FileFilter.is_binary(b"\xff\xfe junk"))
+
+    def test_runner_skips(self):
+        f = FileFilter(max_size=1024)
+        files = [self.text, self.binary, self.large, self.image]
+        runner = command.OperationRunner(command.StatCommand(), file_filter=f)
+        self.assertEqual(len(list(runner.results(files))), 1)
+        self.assertEqual(runner.skipped, files[1:])
+        self.assertEqual(f.summary(), "Skipped 3 files that can't hold a version (1 binary, 1 extension, 1 too large)")
+
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["--getversion", "--max-size", "1024", *files])
+        self.assertEqual(out.getvalue().splitlines(),
+                         [f"Version in {self.text} is {Version(1, 2, 3, '')}",
+                          "Skipped 3 files that can't hold a version (1 binary, 1 extension, 1 too large)"])
+
+    def test_writes_and_checks_not_silently_skipped(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["--bump", "patch", "--max-size", "1024", self.large])
+        self.assertEqual(Version.find(self.large), Version(1, 2, 4, ""))
+        self.assertNotIn("Skipped", out.getvalue())
+
+        with redirect_stdout(out):
+            self.assertRaises(SystemExit, main, ["--check-consistent", self.text, self.binary])
+        self.assertIn(f"ERROR: Skipped '{self.binary}', {BINARY}", out.getvalue())
+
+    def test_not_utf8(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            main(["--getversion", self.latin1])
+            main(["--check-consistent", self.text, self.latin1])
+        self.assertEqual(out.getvalue().splitlines(),
+                         [f"Version in {self.latin1} is {Version(1, 2, 3, '')}",
+                          "All 2 files hold version 1.2.3"])
+
+        with redirect_stdout(out):
+            main(["--bump", "minor", self.latin1])
+            main(["--update", "--version", "2.0.0", self.latin1])
+        with open(self.latin1, "rb") as file:
+            self.assertEqual(file.read(), b"VERSION = '2.0.0'\n# caf\xe9 ok\n")  # the other bytes are untouched
+
+
+if __name__ == "__main__":
+    unittest.main()
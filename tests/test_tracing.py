@@ -0,0 +1,66 @@
+import unittest
+import os
+import json
+
+import temp
+
+from semvermanager import Version, BumpCommand
+from semvermanager.command import OperationRunner
+from semvermanager.tracing import Tracer, NULL_TRACER
+
+
+class TestTracing(unittest.TestCase):
+
+    def test_nested_spans(self):
+        tracer = Tracer()
+        with tracer.span("outer", path="a") as outer:
+            with tracer.span("inner") as inner:
+                inner.set("lines_matched", 2)
+            outer.set("done", True)
+        spans = tracer.spans
+        self.assertEqual([s.name for s in spans], ["inner", "outer"])
+        self.assertEqual(spans[0].depth, 1)
+        self.assertEqual(spans[1].depth, 0)
+        self.assertEqual(spans[0].attrs["lines_matched"], 2)
+        self.assertLessEqual(spans[1].start, spans[0].start)
+
+    def test_null_tracer(self):
+        with NULL_TRACER.span("x", path="y") as span:
+            span.set("a", 1)
+        self.assertEqual(NULL_TRACER.spans, [])
+
+    def test_runner_trace_export(self):
+        tracer = Tracer()
+        temp_filename = temp.tempfile()
+        trace_filename = temp.tempfile()
+        try:
+            Version(0, 1, 0, "").write(temp_filename)
+            runner = OperationRunner(BumpCommand(), tracer=tracer)
+            for cmd in runner([temp_filename], "VERSION", "=", "minor"):
+                list(cmd.items())
+            tracer.export(trace_filename)
+            with open(trace_filename) as file:
+                trace = json.load(file)
+            names = [e["name"] for e in trace["traceEvents"]]
+            self.assertEqual(names, ["OperationRunner.dispatch", "Version.bump_file", "Version.parse_version"])
+            self.assertEqual(trace["traceEvents"][1]["args"]["path"], temp_filename)
+        finally:
+            for f in [temp_filename, temp_filename + ".old", trace_filename]:
+                if os.path.isfile(f):
+                    os.unlink(f)
+
+    def test_bytes_read(self):
+        tracer = Tracer()
+        temp_filename = temp.tempfile()
+        try:
+            with open(temp_filename, "w", encoding="utf-8") as file:
+                file.write("# caf\u00e9\nVERSION = '1.2.3'\n")
+            Version.find(temp_filename, tracer=tracer)
+            span = [s for s in tracer.spans if s.name == "Version.find"][0]
+            self.assertEqual(span.attrs["bytes_read"], os.path.getsize(temp_filename))
+        finally:
+            os.unlink(temp_filename)
+
+
+if __name__ == '__main__':
+    unittest.main()